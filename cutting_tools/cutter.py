@@ -1,25 +1,88 @@
 import os
+from copy import deepcopy
 from pathlib import Path
-import xml.etree.ElementTree as ET
-import requests
 from PIL import Image
 import io
 import logging
 
-from config import username, password, backend_url
+from manifest import Manifest, source_hash
+from writer import OutputWriter
+try:
+    from config import username, password, backend_url
+except ImportError:
+    # Only needed when reading from the backend instead of a snapshot
+    username = password = backend_url = None
+from dolores_common import (
+    DEFAULT_CACHE_SIZE,
+    DataSource,
+    ProjectPrefetcher,
+    ResponseCache,
+    XmlBackend,
+    open_data_source,
+    split_alignment_by_part,
+)
+
+class PageImage:
+    """Page image of a project, downloaded and decoded the first time it is needed."""
+
+    def __init__(self, client: DataSource, project_id: int):
+        self.client = client
+        self.project_id = project_id
+        self._image = None
+        self.failed = False  # The image could not be fetched or decoded
+
+    def get(self):
+        if self._image is None and not self.failed:
+            image_bytes = self.client.fetch_image(self.project_id)
+            try:
+                # Decode once and drop the encoded bytes, every crop reuses the pixels
+                with Image.open(io.BytesIO(image_bytes)) as image:
+                    image.load()
+                self._image = image
+            except Exception as e:
+                print(f"Error opening image for project {self.project_id}: {e}")
+                self.failed = True
+        return self._image
+
+    def close(self):
+        if self._image is not None:
+            self._image.close()
+            self._image = None
 
-GLOBAL_ACCESS_TOKEN = None
 
 class Cutter:
-    def __init__(self, cut_particcellas: bool = False, cut_monophonic: bool = False):
-        # Backend info
-        self.backend_base_url = backend_url
-        self.username = username
-        self.password = password
+    def __init__(
+        self,
+        cut_particcellas: bool = False,
+        cut_monophonic: bool = False,
+        workers: int = 8,
+        cache_dir: Path = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        offline: bool = False,
+        xml_backend: str = "etree",
+        writers: int = 2,
+        image_format: str = "png",
+        png_compression: int = 6,
+        resume: bool = True,
+        snapshot: Path = None,
+    ):
+        # Backend info, or a local snapshot of it
+        self.workers = workers
+        self.lookahead = max(1, workers // 2)
+        cache = ResponseCache(cache_dir, cache_size) if cache_dir is not None and snapshot is None else None
+        self.client = open_data_source(
+            snapshot,
+            backend_url,
+            username,
+            password,
+            max_connections=self.workers + self.lookahead,
+            cache=cache,
+            offline=offline,
+        )
         
         #Backend pre-ops
-        self._authenticate()
-        self.projects_dict = self._fetch_projects()
+        self.client.authenticate()
+        self.projects_dict = self.client.fetch_projects()
         
         #Local info
         self.output_base = Path("output_data")
@@ -35,10 +98,19 @@ class Cutter:
         self.polyphonic_mxmls_dir.mkdir(parents=True, exist_ok=True)
         
         #Program info
+        self.xml = XmlBackend(xml_backend)
         self.cut_particcellas = cut_particcellas
         self.cut_monophonic = cut_monophonic
         self.img_padding = 0  # Padding for image cropping
 
+        # Outputs are encoded and written in the background while the next lines are processed
+        self.writer = OutputWriter(writers, image_format=image_format, png_compression=png_compression)
+
+        # Lines already cut by previous runs, skipped unless their data changed
+        self.resume = resume
+        options = f"particcellas={cut_particcellas},monophonic={cut_monophonic},format={image_format},png_compression={png_compression}"
+        self.manifest = Manifest(self.output_base / "manifest.jsonl", options)
+
         # Logging setup
         self.log_file = self.output_base / "particcellas_log.txt"
         logging.basicConfig(
@@ -50,109 +122,15 @@ class Cutter:
             ]
         )
 
-    def _authenticate(self):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/token"
-        data = {
-            'grant_type': 'password',
-            'username': self.username,
-            'password': self.password,
-            'scope': '',
-            'client_id': '',
-            'client_secret': '',
-        }
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        try:
-            response = requests.post(url, data=data, headers=headers)
-            response.raise_for_status()
-            token_data = response.json()
-            GLOBAL_ACCESS_TOKEN = token_data.get('access_token')
-            if not GLOBAL_ACCESS_TOKEN:
-                raise Exception("No access_token in response")
-        except Exception as e:
-            print(f"Error authenticating with backend: {e}")
-            GLOBAL_ACCESS_TOKEN = None
-
-    def _fetch_projects(self):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/projects"
-        headers = {}
-        if GLOBAL_ACCESS_TOKEN:
-            headers['Authorization'] = f"Bearer {GLOBAL_ACCESS_TOKEN}"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            projects = response.json()
-            return {proj["project_id"]: proj["project_name"] for proj in projects}
-        except Exception as e:
-            print(f"Error fetching projects from backend: {e}")
-            return {}
-
-    def _fetch_lines(self, project_id):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/lines/{project_id}"
-        headers = {}
-        if GLOBAL_ACCESS_TOKEN:
-            headers['Authorization'] = f"Bearer {GLOBAL_ACCESS_TOKEN}"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error fetching lines for project {project_id}: {e}")
-            return None
-
-    def _fetch_musicxml(self, project_id, line_id):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/transcription/musicxml/{project_id}/{line_id}"
-        headers = {}
-        if GLOBAL_ACCESS_TOKEN:
-            headers['Authorization'] = f"Bearer {GLOBAL_ACCESS_TOKEN}"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.content
-        except Exception as e:
-            print(f"Error fetching musicxml for project {project_id}, line {line_id}: {e}")
-            return None
-
-    def _fetch_alignment(self, project_id, line_id):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/alignment/{project_id}/{line_id}"
-        headers = {}
-        if GLOBAL_ACCESS_TOKEN:
-            headers['Authorization'] = f"Bearer {GLOBAL_ACCESS_TOKEN}"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error fetching alignment for project {project_id}, line {line_id}: {e}")
-            return None
-
-    def _fetch_image(self, project_id):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/image/{project_id}"
-        headers = {}
-        if GLOBAL_ACCESS_TOKEN:
-            headers['Authorization'] = f"Bearer {GLOBAL_ACCESS_TOKEN}"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.content
-        except Exception as e:
-            print(f"Error fetching image for project {project_id}: {e}")
-            return None
-        
     def is_monophonic(self, part):
         # Return False if the part has a staff-layout item
-        if part.find(".//staff-layout") is not None:
+        if self.xml.findall(part, ".//staff-layout"):
             return False
 
         staff_voices = {}  # maps staff number to set of voices used
 
-        for measure in part.findall("measure"):
-            for note in measure.findall("note"):
+        for measure in self.xml.findall(part, "measure"):
+            for note in self.xml.findall(measure, "note"):
                 voice_el = note.find("voice")
                 staff_el = note.find("staff")
 
@@ -171,186 +149,237 @@ class Cutter:
         return True 
 
     def cut(self):
-        for project_id, project_name in self.projects_dict.items():
-            lines_info = self._fetch_lines(project_id)
-            if not lines_info or "line_ids" not in lines_info:
+        prefetcher = ProjectPrefetcher(
+            self.client, max_workers=self.workers, lookahead=self.lookahead, skip_line=self._is_cut
+        )
+        with self.writer:
+            for project in prefetcher.iter_projects(self.projects_dict):
+                if not project.lines_info or "line_ids" not in project.lines_info:
+                    continue
+
+                # Project image, only fetched once a line can actually be cut
+                page_image = PageImage(self.client, project.project_id)
+                try:
+                    self._cut_project(project, page_image)
+                finally:
+                    page_image.close()
+        self.manifest.close()
+
+    def _is_cut(self, project_id, line_id):
+        # Lines of a known revision can be skipped before downloading them
+        version = self.client.versions.get(project_id)
+        return self.resume and version is not None and self.manifest.is_done(project_id, line_id, version)
+
+    def _cut_project(self, project, page_image):
+        project_id, project_name = project.project_id, project.project_name
+
+        for line_id in project.lines_info["line_ids"]:
+            version = self.client.versions.get(project_id)
+            musicxml_bytes = project.musicxml.get(line_id)
+            source = source_hash(musicxml_bytes, project.alignment.get(line_id)) if musicxml_bytes else None
+            if self.resume and self.manifest.is_done(project_id, line_id, version, source):
+                print(f"Skipping {project_name} (ID: {project_id}) line {line_id}, already cut")
                 continue
 
-            # Fetch project image 
-            image_bytes = self._fetch_image(project_id)
-            try:
-                image_obj = Image.open(io.BytesIO(image_bytes))
-            except Exception as e:
-                print(f"Error opening image for project {project_id}: {e}")
-                image_obj = None
+            outputs = {}
+            if self._cut_line(project, line_id, page_image, outputs) and not page_image.failed:
+                self.manifest.record_when_written(project_id, line_id, version, source, outputs)
 
-            for line_id in lines_info["line_ids"]:
-                line_coords = lines_info["line_coords"][line_id-1]
-                musicxml_bytes = self._fetch_musicxml(project_id, line_id)
-                if not musicxml_bytes:
-                    continue
-                try:
-                    tree = ET.ElementTree(ET.fromstring(musicxml_bytes))
-                except Exception as e:
-                    print(f"Error parsing MusicXML for project {project_id}, line {line_id}: {e}")
-                    continue
-                root = tree.getroot()
-                parts = root.findall('.//part')
-                file_stem = f"{project_name}.{str(line_id).zfill(2)}"
-                
-                if len(parts) <= 1:
-                    if self.cut_monophonic:
-                        if self.is_monophonic(parts[0]):
-                            print(f"Processing monophonic: {project_name} (ID: {project_id}) line {line_id}")
-                            
-                            # Save musicxml as it is
-                            out_file = self.monophonic_mxmls_dir / f"{file_stem}.musicxml"
-                            with open(out_file, "wb") as f:
-                                f.write(musicxml_bytes)
-                            
-                            # Calculate min second index and max fourth index from bbox values
-                            alignment = self._fetch_alignment(project_id, line_id)
-                            min_second = None
-                            max_fourth = None
-                            if alignment and "annotations" in alignment:
-                                for ann in alignment["annotations"]:
-                                    ann_id = ann.get("mxml_id")
-                                    bbox = ann.get("bbox")
-                                    if bbox and isinstance(bbox, list) and len(bbox) == 4:
-                                        second = bbox[1]
-                                        fourth = bbox[3]
-                                        if min_second is None or second < min_second:
-                                            min_second = second
-                                        if max_fourth is None or fourth > max_fourth:
-                                            max_fourth = fourth
-                            #print(f"Part {part_id} min second index: {min_second}, max fourth index: {max_fourth}")
-
-                            # Cut and save image for this line
-                            if image_obj and min_second is not None and max_fourth is not None:
-                                # Offset to line coords
-                                min_second = min_second + line_coords[1]
-                                max_fourth = max_fourth + line_coords[1]
-                                # Ensure bounds are within image
-                                width, height = image_obj.size
-                                top = max(0, min_second - self.img_padding)
-                                bottom = min(height, max_fourth + self.img_padding)
-                                if top <= bottom:
-                                    cropped = image_obj.crop((0, top, width, bottom))
-                                    img_out_file = self.monophonic_img_dir / f"{file_stem}.png"
-                                    cropped.save(img_out_file)
-                                else:
-                                    print("ValueError: Coordinate 'lower' is less than 'upper'")
-                                    continue
-                            else:
-                                print(f"Could not cut image for line {line_id} (missing image or bbox info)")
-                                continue
+    def _cut_line(self, project, line_id, page_image, outputs):
+        project_id, project_name = project.project_id, project.project_name
+        lines_info = project.lines_info
+
+        line_coords = lines_info["line_coords"][line_id-1]
+        musicxml_bytes = project.musicxml.get(line_id)
+        if not musicxml_bytes:
+            return False
+        try:
+            root = self.xml.fromstring(musicxml_bytes)
+        except Exception as e:
+            print(f"Error parsing MusicXML for project {project_id}, line {line_id}: {e}")
+            return False
+        parts = self.xml.findall(root, './/part')
+        file_stem = f"{project_name}.{str(line_id).zfill(2)}"
+        # Lines missing some output are not recorded, so they are cut again on rerun
+        complete = True
+        
+        if len(parts) <= 1:
+            if self.cut_monophonic:
+                if self.is_monophonic(parts[0]):
+                    print(f"Processing monophonic: {project_name} (ID: {project_id}) line {line_id}")
+                    
+                    # Save musicxml as it is
+                    out_file = self.monophonic_mxmls_dir / f"{file_stem}.musicxml"
+                    outputs[out_file] = self.writer.write_bytes(out_file, musicxml_bytes)
+                    
+                    # Calculate min second index and max fourth index from bbox values
+                    alignment = project.alignment.get(line_id)
+                    min_second = None
+                    max_fourth = None
+                    if alignment and "annotations" in alignment:
+                        for ann in alignment["annotations"]:
+                            ann_id = ann.get("mxml_id")
+                            bbox = ann.get("bbox")
+                            if bbox and isinstance(bbox, list) and len(bbox) == 4:
+                                second = bbox[1]
+                                fourth = bbox[3]
+                                if min_second is None or second < min_second:
+                                    min_second = second
+                                if max_fourth is None or fourth > max_fourth:
+                                    max_fourth = fourth
+                    #print(f"Part {part_id} min second index: {min_second}, max fourth index: {max_fourth}")
+
+                    # Cut and save image for this line
+                    image_obj = page_image.get() if min_second is not None and max_fourth is not None else None
+                    if image_obj and min_second is not None and max_fourth is not None:
+                        # Offset to line coords
+                        min_second = min_second + line_coords[1]
+                        max_fourth = max_fourth + line_coords[1]
+                        # Ensure bounds are within image
+                        width, height = image_obj.size
+                        top = max(0, min_second - self.img_padding)
+                        bottom = min(height, max_fourth + self.img_padding)
+                        if top <= bottom:
+                            cropped = image_obj.crop((0, top, width, bottom))
+                            img_out_file = self.monophonic_img_dir / f"{file_stem}{self.writer.image_extension}"
+                            outputs[img_out_file] = self.writer.write_image(img_out_file, cropped)
                         else:
-                            #Per les polifoniques simplement guardem musicxml as it is
-                            print(f"Processing polyphonic: {project_name} (ID: {project_id}) line {line_id}")
-                            out_file = self.polyphonic_mxmls_dir / f"{file_stem}.musicxml"
-                            with open(out_file, "wb") as f:
-                                f.write(musicxml_bytes)
+                            print("ValueError: Coordinate 'lower' is less than 'upper'")
+                            return False
+                    else:
+                        print(f"Could not cut image for line {line_id} (missing image or bbox info)")
+                        return False
                 else:
-                    if self.cut_particcellas:
-                        log_msg = f"Splitting particcella: {project_name} (ID: {project_id}) line {line_id}"
-                        print(log_msg)
-                        logging.info(log_msg)
-                        # Find the part-list element and its index
-                        part_list = None
-                        part_list_idx = None
-                        for idx, child in enumerate(root):
-                            if child.tag.endswith('part-list'):
-                                part_list = child
-                                part_list_idx = idx
-                                break
-                        
-                        for idx, part in enumerate(parts):
-                            part_id = part.attrib.get('id', f'part{idx+1}')
-                            # Fetch alignment data for this line
-                            alignment = self._fetch_alignment(project_id, line_id)
-                            mxml_bbox_dict = {}
-                            if alignment and "annotations" in alignment:
-                                mxml_ids = {elem.attrib.get('id') for elem in part.iter() if elem.attrib.get('id')}
-                                for ann in alignment["annotations"]:
-                                    ann_id = ann.get("mxml_id")
-                                    if ann_id and (ann_id in mxml_ids or any(ann_id.startswith(f"{mid}.") for mid in mxml_ids)):
-                                        mxml_bbox_dict[ann_id] = ann.get("bbox")
-                            log_msg = f"Part {part_id} mxml_id->bbox: {mxml_bbox_dict}"
-                            #print(log_msg)
-                            logging.info(log_msg)
-
-                            # Calculate min second index and max fourth index from bbox values
-                            min_second = None
-                            max_fourth = None
-                            for ann_id, bbox in mxml_bbox_dict.items():
-                                #'pP' not in ann_id --> Temporal fix degut a id erroni de les measures a alineacions (Tots els atributs d'una measure els posa a la part 1 independentment de a quina part pertanyin realment)
-                                if bbox and isinstance(bbox, list) and len(bbox) == 4 \
-                                        and 'pP' not in ann_id \
-                                        and 'barline' not in ann_id:
-                                    second = bbox[1]
-                                    fourth = bbox[3]
-                                    if min_second is None or second < min_second:
-                                        min_second = second
-                                    if max_fourth is None or fourth > max_fourth:
-                                        max_fourth = fourth
-
-                            log_msg = f"Part {part_id} min second index: {min_second}, max fourth index: {max_fourth}"
-                            #print(log_msg)
-                            logging.info(log_msg)
-
-                            # Cut and save image for this part
-                            if image_obj and min_second is not None and max_fourth is not None:
-                                # Offset to line coords
-                                min_second = min_second + line_coords[1]
-                                max_fourth = max_fourth + line_coords[1]
-                                # Ensure bounds are within image
-                                width, height = image_obj.size
-                                top = max(0, min_second - self.img_padding)
-                                print("Height: ", height)
-                                print("max_fourth: ", max_fourth)
-                                bottom = min(height, max_fourth + self.img_padding)
-                                if top <= bottom:
-                                    cropped = image_obj.crop((0, top, width, bottom))     
-                                    img_out_file = self.particcellas_img_dir / f"{file_stem}_P{str(idx+1).zfill(2)}.png"
-                                    cropped.save(img_out_file)
-                                else:
-                                    print("ValueError: Coordinate 'lower' is less than 'upper'")
-                                    continue
-                            else:
-                                print(f"Could not cut image for part {part_id} (missing image or bbox info)")
-                                continue
-
-                            # Copy all elements before part-list
-                            new_root = ET.Element(root.tag, root.attrib)
-                            for child in list(root)[:part_list_idx]:
-                                new_root.append(self._deepcopy_element(child))
-                            # Add filtered part-list
-                            if part_list is not None:
-                                filtered_part_list = self._filter_part_list(part_list, part_id)
-                                new_root.append(filtered_part_list)
-                            # Add this part
-                            new_root.append(self._deepcopy_element(part))
-                            # Write new file
-                            new_tree = ET.ElementTree(new_root)
-                            out_file = self.particcellas_mxmls_dir / f"{file_stem}_P{str(idx+1).zfill(2)}.musicxml"
-                            new_tree.write(out_file, encoding='utf-8', xml_declaration=True)
+                    #Per les polifoniques simplement guardem musicxml as it is
+                    print(f"Processing polyphonic: {project_name} (ID: {project_id}) line {line_id}")
+                    out_file = self.polyphonic_mxmls_dir / f"{file_stem}.musicxml"
+                    outputs[out_file] = self.writer.write_bytes(out_file, musicxml_bytes)
+        else:
+            if self.cut_particcellas:
+                log_msg = f"Splitting particcella: {project_name} (ID: {project_id}) line {line_id}"
+                print(log_msg)
+                logging.info(log_msg)
+                # Find the part-list element and its index
+                part_list = None
+                part_list_idx = None
+                for idx, child in enumerate(root):
+                    if child.tag.endswith('part-list'):
+                        part_list = child
+                        part_list_idx = idx
+                        break
+                
+                # Alignment data is shared by all parts of the line, so split it once
+                alignment = project.alignment.get(line_id)
+                part_bbox_dicts = split_alignment_by_part(parts, alignment)
+
+                for idx, part in enumerate(parts):
+                    part_id = part.attrib.get('id', f'part{idx+1}')
+                    mxml_bbox_dict = part_bbox_dicts[idx]
+                    log_msg = f"Part {part_id} mxml_id->bbox: {mxml_bbox_dict}"
+                    #print(log_msg)
+                    logging.info(log_msg)
+
+                    # Calculate min second index and max fourth index from bbox values
+                    min_second = None
+                    max_fourth = None
+                    for ann_id, bbox in mxml_bbox_dict.items():
+                        #'pP' not in ann_id --> Temporal fix degut a id erroni de les measures a alineacions (Tots els atributs d'una measure els posa a la part 1 independentment de a quina part pertanyin realment)
+                        if bbox and isinstance(bbox, list) and len(bbox) == 4 \
+                                and 'pP' not in ann_id \
+                                and 'barline' not in ann_id:
+                            second = bbox[1]
+                            fourth = bbox[3]
+                            if min_second is None or second < min_second:
+                                min_second = second
+                            if max_fourth is None or fourth > max_fourth:
+                                max_fourth = fourth
+
+                    log_msg = f"Part {part_id} min second index: {min_second}, max fourth index: {max_fourth}"
+                    #print(log_msg)
+                    logging.info(log_msg)
+
+                    # Cut and save image for this part
+                    image_obj = page_image.get() if min_second is not None and max_fourth is not None else None
+                    if image_obj and min_second is not None and max_fourth is not None:
+                        # Offset to line coords
+                        min_second = min_second + line_coords[1]
+                        max_fourth = max_fourth + line_coords[1]
+                        # Ensure bounds are within image
+                        width, height = image_obj.size
+                        top = max(0, min_second - self.img_padding)
+                        print("Height: ", height)
+                        print("max_fourth: ", max_fourth)
+                        bottom = min(height, max_fourth + self.img_padding)
+                        if top <= bottom:
+                            cropped = image_obj.crop((0, top, width, bottom))     
+                            img_out_file = self.particcellas_img_dir / f"{file_stem}_P{str(idx+1).zfill(2)}{self.writer.image_extension}"
+                            outputs[img_out_file] = self.writer.write_image(img_out_file, cropped)
+                        else:
+                            print("ValueError: Coordinate 'lower' is less than 'upper'")
+                            complete = False
+                            continue
+                    else:
+                        print(f"Could not cut image for part {part_id} (missing image or bbox info)")
+                        complete = False
+                        continue
+
+                    # Copy all elements before part-list
+                    new_root = self.xml.Element(root.tag, root.attrib)
+                    for child in list(root)[:part_list_idx]:
+                        new_root.append(deepcopy(child))
+                    # Add filtered part-list
+                    if part_list is not None:
+                        filtered_part_list = self._filter_part_list(part_list, part_id)
+                        new_root.append(filtered_part_list)
+                    # Add this part
+                    new_root.append(deepcopy(part))
+                    # Write new file
+                    new_tree = self.xml.ElementTree(new_root)
+                    out_file = self.particcellas_mxmls_dir / f"{file_stem}_P{str(idx+1).zfill(2)}.musicxml"
+                    outputs[out_file] = self.writer.write_tree(out_file, new_tree)
+        return complete
+
 
     def _filter_part_list(self, part_list_elem, part_id):
-        new_part_list = ET.Element(part_list_elem.tag, part_list_elem.attrib)
+        new_part_list = self.xml.Element(part_list_elem.tag, part_list_elem.attrib)
         for child in part_list_elem:
             if child.tag.endswith('score-part') and child.attrib.get('id') == part_id:
-                new_part_list.append(self._deepcopy_element(child))
+                new_part_list.append(deepcopy(child))
         return new_part_list
 
-    def _deepcopy_element(self, elem):
-        new_elem = ET.Element(elem.tag, elem.attrib)
-        new_elem.text = elem.text
-        new_elem.tail = elem.tail
-        for child in elem:
-            new_elem.append(self._deepcopy_element(child))
-        return new_elem
-
-def cut_scores(cut_particcellas: bool = False, cut_monophonic: bool = False):
-    cutter = Cutter(cut_particcellas=cut_particcellas, cut_monophonic=cut_monophonic)
+def cut_scores(
+    cut_particcellas: bool = False,
+    cut_monophonic: bool = False,
+    workers: int = 8,
+    cache_dir: Path = None,
+    cache_size: int = DEFAULT_CACHE_SIZE,
+    offline: bool = False,
+    xml_backend: str = "etree",
+    writers: int = 2,
+    image_format: str = "png",
+    png_compression: int = 6,
+    resume: bool = True,
+    snapshot: Path = None,
+):
+    cutter = Cutter(
+        cut_particcellas=cut_particcellas,
+        cut_monophonic=cut_monophonic,
+        workers=workers,
+        cache_dir=cache_dir,
+        cache_size=cache_size,
+        offline=offline,
+        xml_backend=xml_backend,
+        writers=writers,
+        image_format=image_format,
+        png_compression=png_compression,
+        resume=resume,
+        snapshot=snapshot,
+    )
     cutter.cut()
-    print("Score processing finished. Output in " + str(cutter.output_base))
\ No newline at end of file
+    print("Score processing finished. Output in " + str(cutter.output_base))
+    if cutter.writer.errors:
+        print(f"{cutter.writer.errors} outputs could not be written")
+    if cutter.client.cache is not None:
+        print(f"Cache hits: {cutter.client.cache.hits}, misses: {cutter.client.cache.misses}")
+    for line in cutter.client.stats_report():
+        print(line)
\ No newline at end of file
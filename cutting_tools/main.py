@@ -1,7 +1,12 @@
+import sys
 from argparse import ArgumentParser
 from pathlib import Path
 
+# Make the shared dolores_common package importable when running from this folder
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
 from cutter import cut_scores
+from dolores_common import XML_BACKENDS
 
 if __name__ == "__main__":
     parser = ArgumentParser()
@@ -12,9 +17,52 @@ if __name__ == "__main__":
     parser.add_argument(
         "--cut_mono_homo", action='store_true', help='Cut monophonic and homophonic scores - Images'
     )
+    parser.add_argument(
+        "--workers", type=int, default=8, help='Maximum number of concurrent requests to the backend'
+    )
+    parser.add_argument(
+        "--cache_dir", type=Path, default=None, help='Directory for the persistent cache of backend responses'
+    )
+    parser.add_argument(
+        "--cache_size", type=int, default=2048, help='Size budget of the response cache in MB'
+    )
+    parser.add_argument(
+        "--offline", action='store_true', help='Run only from the response cache, without touching the backend'
+    )
+    parser.add_argument(
+        "--xml_backend", choices=XML_BACKENDS, default="etree", help='Library used to parse and write MusicXML'
+    )
+    parser.add_argument(
+        "--writers", type=int, default=2, help='Number of threads encoding and writing outputs'
+    )
+    parser.add_argument(
+        "--png_compression", type=int, default=6, choices=range(10), metavar="[0-9]", help='zlib compression level of PNG images'
+    )
+    parser.add_argument(
+        "--webp", action='store_true', help='Write images as lossless WebP instead of PNG'
+    )
+    parser.add_argument(
+        "--force", action='store_true', help='Cut every line again, even those the manifest of previous runs records as done'
+    )
+    parser.add_argument(
+        "--snapshot", type=Path, default=None, help='Read the projects from a local snapshot directory instead of the backend'
+    )
     args = parser.parse_args()
 
     if not args.cut_particcellas and not args.cut_mono_homo:
         raise ValueError("You must specify at least one of --cut_particcellas or --cut_mono_homo")
 
-    cut_scores(cut_particcellas=args.cut_particcellas, cut_monophonic=args.cut_mono_homo)
\ No newline at end of file
+    cut_scores(
+        cut_particcellas=args.cut_particcellas,
+        cut_monophonic=args.cut_mono_homo,
+        workers=args.workers,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size * 1024**2,
+        offline=args.offline,
+        xml_backend=args.xml_backend,
+        writers=args.writers,
+        image_format="webp" if args.webp else "png",
+        png_compression=args.png_compression,
+        resume=not args.force,
+        snapshot=args.snapshot,
+    )
\ No newline at end of file
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+
+def source_hash(musicxml_bytes, alignment):
+    """Hash of the backend data a line is cut from."""
+    digest = hashlib.sha256(musicxml_bytes)
+    digest.update(json.dumps(alignment, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Append-only record of the lines the cutter has finished.
+
+    Every line whose outputs were all written gets a JSON line in ``path`` with the
+    project revision reported by the backend, a hash of the MusicXML and alignment
+    it was cut from, the options of the run and the sha256 of every output file.
+    A later run skips the lines whose record still matches, so an interrupted run
+    resumes where it stopped and an incremental run only cuts new or changed lines.
+    When a line is recorded more than once the last record wins.
+
+    Parameters
+    ----------
+    path : Path
+        JSONL file holding the records. Created if it does not exist.
+    options : str
+        Description of the run options that affect the outputs. Records made with
+        different options never match.
+    """
+
+    def __init__(self, path: Path, options: str):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.options = options
+        self.records = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Last line of a run that was killed while writing it
+                        continue
+                    self.records[(record["project_id"], record["line_id"])] = record
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def is_done(self, project_id, line_id, version=None, source=None):
+        """Whether a line was already cut from the same data with the same options.
+
+        The line matches if its record has the same project revision, or, when
+        the revision is unknown, the same source hash, and all its outputs exist.
+        """
+        record = self.records.get((project_id, line_id))
+        if record is None or record["options"] != self.options:
+            return False
+        if version is not None:
+            if record["version"] != version:
+                return False
+        elif source is None or record["source"] != source:
+            return False
+        return all((self.root / output).exists() for output in record["outputs"])
+
+    def record_when_written(self, project_id, line_id, version, source, outputs):
+        """Record a line once all its outputs have been written.
+
+        Parameters
+        ----------
+        outputs : Dict[Path, Future]
+            Pending writes of the line, whose results are the sha256 of the files.
+            Nothing is recorded if any of them fails.
+        """
+        if not outputs:
+            self._append(project_id, line_id, version, source, {})
+            return
+
+        pending = [len(outputs)]
+
+        def done(_):
+            with self._lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            if any(future.exception() is not None for future in outputs.values()):
+                return
+            hashes = {
+                str(Path(path).relative_to(self.root)): future.result()
+                for path, future in outputs.items()
+            }
+            self._append(project_id, line_id, version, source, hashes)
+
+        for future in outputs.values():
+            future.add_done_callback(done)
+
+    def _append(self, project_id, line_id, version, source, hashes):
+        record = {
+            "project_id": project_id,
+            "line_id": line_id,
+            "version": version,
+            "source": source,
+            "options": self.options,
+            "outputs": hashes,
+        }
+        with self._lock:
+            self.records[(project_id, line_id)] = record
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
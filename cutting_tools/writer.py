@@ -0,0 +1,98 @@
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+IMAGE_FORMATS = {"png": ".png", "webp": ".webp"}
+
+
+class OutputWriter:
+    """Write the cutter outputs from a pool of background threads.
+
+    Encoding images and serializing MusicXML overlap with fetching and parsing the
+    next lines. At most ``max_pending`` outputs are queued; once the limit is reached
+    the caller blocks until a writer frees a slot, so memory stays bounded when
+    encoding is slower than the rest of the pipeline.
+
+    Parameters
+    ----------
+    workers : int
+        Number of writer threads.
+    max_pending : int | None
+        Maximum number of outputs queued or being written. Defaults to twice the
+        number of workers.
+    image_format : str
+        Either "png" or "webp". WebP images are written losslessly.
+    png_compression : int
+        zlib compression level for PNG images, from 0 (fastest) to 9 (smallest).
+    """
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_pending: int = None,
+        image_format: str = "png",
+        png_compression: int = 6,
+    ):
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported image format {image_format}")
+        if not 0 <= png_compression <= 9:
+            raise ValueError("PNG compression level must be between 0 and 9")
+
+        self.image_format = image_format
+        self.image_extension = IMAGE_FORMATS[image_format]
+        self.png_compression = png_compression
+        self.errors = 0
+
+        workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="writer")
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * workers)
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Wait for every queued output to be written."""
+        self._pool.shutdown(wait=True)
+
+    # Every write returns a future whose result is the sha256 of the written file
+
+    def write_bytes(self, path: Path, data: bytes) -> Future:
+        return self._submit(path, path.write_bytes, data)
+
+    def write_tree(self, path: Path, tree) -> Future:
+        return self._submit(path, tree.write, path, encoding='utf-8', xml_declaration=True)
+
+    def write_image(self, path: Path, image: Image.Image) -> Future:
+        if self.image_format == "webp":
+            return self._submit(path, image.save, path, format="WEBP", lossless=True)
+        return self._submit(path, image.save, path, format="PNG", compress_level=self.png_compression)
+
+    def _submit(self, path, fn, *args, **kwargs):
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(self._write, path, fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._done(path, f))
+        return future
+
+    @staticmethod
+    def _write(path, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+    def _done(self, path: Path, future: Future):
+        self._slots.release()
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                self.errors += 1
+            print(f"Error writing {path}: {error}")
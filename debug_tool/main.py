@@ -1,4 +1,5 @@
 import logging
+import sys
 import tkinter as tk
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
@@ -6,6 +7,9 @@ from tkinter import ttk
 from tkinter.filedialog import askdirectory
 from typing import List, Optional
 
+# Make the shared dolores_common package importable when running from this folder
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
 from project_data import DoloresProject
 from firebase_data import FirebaseData
 from project_navigator_window import ProjectNavigatorWindow
@@ -1,2 +1,2 @@
-pyinstaller ./main.py
+pyinstaller --paths .. ./main.py
 cp -r ./icons ./dist/main/_internal/
\ No newline at end of file
@@ -14,6 +14,9 @@ import numpy as np
 from matplotlib import colormaps
 from matplotlib.patches import Polygon, Rectangle
 
+from dolores_common import geometry
+from dolores_common.geometry import Point, flat_to_array, scale_coords
+
 # import matplotlib
 # matplotlib.use("tkagg")
 
@@ -81,82 +84,31 @@ class Category(Enum):
         return colormaps["gist_rainbow"](cur_category * (1 / max_category))
 
 
-@dataclass
-class Point:
-    x: int
-    y: int
-
-    def __add__(self, point: Point) -> Point:
-        return Point(self.x + point.x, self.y + point.y)
-
-    def __iadd__(self, point: Point) -> Point:
-        self.x += point.x
-        self.y += point.y
-
-        return self
-
-    def __mul__(self, factor: float) -> Point:
-        return Point(int(self.x * factor), int(self.y * factor))
-
-    def __imul__(self, factor: float) -> Point:
-        self.x = int(self.x * factor)
-        self.y = int(self.y * factor)
-
-        return self
-
-    def as_tuple(self) -> Tuple[int, int]:
-        return (self.x, self.y)
-
-
-@dataclass
-class BoundingBox:
-    tl: Point
-    br: Point
-
-    def __str__(self) -> str:
-        return f"TL: {self.tl.x}, {self.tl.y} BR: {self.br.x}, {self.br.y}"
-
-    def __repr__(self) -> str:
-        return str(self)
-
-    @property
-    def width(self) -> int:
-        return self.br.x - self.tl.x
-
-    @property
-    def height(self) -> int:
-        return self.br.y - self.tl.y
+class BoundingBox(geometry.BoundingBox):
+    __slots__ = ()
 
     def get_patch(self) -> Rectangle:
         return Rectangle(self.tl.as_tuple(), self.width, self.height)
 
-    def offset(self, point: Point) -> None:
-        self.tl += point
-        self.br += point
-
-    def scale(self, factor: float) -> BoundingBox:
-        return BoundingBox(self.tl * factor, self.br * factor)
-
 
 @dataclass
 class Annotation:
     bbox: BoundingBox  # Bounding box around the annotation
-    poly: List[Point]  # Polygon representing the annotation
+    poly: np.ndarray  # Polygon representing the annotation, as (N, 2) coordinates
     ident: str  # Object identifier from the MusicXML
     category: Category
 
     def get_poly_patch(self) -> Polygon:
-        point_array = np.array(list(map(lambda x: x.as_tuple(), self.poly)))
-        return Polygon(point_array, closed=True)
+        return Polygon(self.poly, closed=True)
 
     def offset(self, point: Point) -> None:
         self.bbox.offset(point)
-        self.poly = list(map(lambda x: x + point, self.poly))
+        self.poly = self.poly + point.as_tuple()
 
     def scale(self, factor: float) -> Annotation:
         return Annotation(
             self.bbox.scale(factor),
-            list(map(lambda x: x * factor, self.poly)),
+            scale_coords(self.poly, factor),
             self.ident,
             self.category,
         )
@@ -170,10 +122,22 @@ class ImageSlice:
     gt_file: Optional[Path]
 
     def scale(self, factor: float) -> ImageSlice:
+        # Scale the boxes and the polygons of all annotations as two arrays
+        boxes = scale_coords(
+            np.array([x.bbox.as_array() for x in self.anns]).reshape(-1, 4), factor
+        )
+        polys = scale_coords(
+            np.concatenate([x.poly for x in self.anns] + [np.empty((0, 2))]), factor
+        )
+        splits = np.cumsum([len(x.poly) for x in self.anns])[:-1]
+
         return ImageSlice(
             slice_idx=self.slice_idx,
             bbox=self.bbox.scale(factor),
-            anns=list(map(lambda x: x.scale(factor), self.anns)),
+            anns=[
+                Annotation(BoundingBox.from_array(box), poly, ann.ident, ann.category)
+                for ann, box, poly in zip(self.anns, boxes, np.split(polys, splits))
+            ],
             gt_file=self.gt_file,
         )
 
@@ -290,10 +254,7 @@ class DoloresProject:
         # Load annotations
         for ann in transcript["annotations"]:
             im_slice = id2slice[ann["imageId"]]
-            polygon = [
-                Point(x, y)
-                for x, y in zip(ann["segmentation"][0::2], ann["segmentation"][1::2])
-            ]
+            polygon = flat_to_array(ann["segmentation"])
             bbox = BoundingBox(Point(*ann["bbox"][:2]), Point(*ann["bbox"][2:]))
             cat = ann["categoryId"]
 
@@ -360,8 +321,8 @@ class DoloresProject:
                 ann_polygon.set(color=self.get_category_color(ann.category), fill=False)
                 ax.add_patch(ann_polygon)
                 ax.text(
-                    ann.poly[0].x + 10,
-                    ann.poly[0].y + 10,
+                    ann.poly[0][0] + 10,
+                    ann.poly[0][1] + 10,
                     f"{ann.ident} ({ann.category.value})",
                 )
 
@@ -0,0 +1,62 @@
+"""Utilities shared by the DoLoReS command line tools.
+
+The names below are imported from their modules on first access, so tools that only
+need the geometry or the SVG index do not pull in the backend client and its
+dependencies.
+"""
+
+from importlib import import_module
+from typing import Any
+
+# Public name -> module defining it
+_EXPORTS = {
+    "DEFAULT_CACHE_SIZE": "cache",
+    "ResponseCache": "cache",
+    "BackendClient": "client",
+    "EndpointStats": "client",
+    "BoundingBox": "geometry",
+    "Point": "geometry",
+    "MxmlIdIndex": "mxml_ids",
+    "split_alignment_by_part": "mxml_ids",
+    "ProjectData": "prefetch",
+    "ProjectPrefetcher": "prefetch",
+    "DataSource": "snapshot",
+    "SnapshotSource": "snapshot",
+    "export_snapshot": "snapshot",
+    "open_data_source": "snapshot",
+    "SvgIndex": "svg_index",
+    "XML_BACKENDS": "xml_backend",
+    "XmlBackend": "xml_backend",
+}
+
+__all__ = [
+    "BackendClient",
+    "BoundingBox",
+    "DataSource",
+    "DEFAULT_CACHE_SIZE",
+    "EndpointStats",
+    "MxmlIdIndex",
+    "Point",
+    "ProjectData",
+    "ProjectPrefetcher",
+    "ResponseCache",
+    "SnapshotSource",
+    "SvgIndex",
+    "export_snapshot",
+    "open_data_source",
+    "split_alignment_by_part",
+    "XML_BACKENDS",
+    "XmlBackend",
+]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
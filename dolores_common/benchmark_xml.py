@@ -0,0 +1,103 @@
+"""Compare the XML backends on the operations the tools perform on MusicXML lines.
+
+Usage: ``python -m dolores_common.benchmark_xml [files or directories ...]``
+
+Every backend parses each file of the corpus, queries its parts, measures and
+notes, copies every part as the cutter does for particcellas and serializes the
+result. Defaults to the sample score shipped with merge_and_validate.
+"""
+
+import io
+import statistics
+import time
+from argparse import ArgumentParser, Namespace
+from copy import deepcopy
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from .xml_backend import XML_BACKENDS, XmlBackend
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent.parent / "merge_and_validate" / "test.musicxml"
+
+
+def load_corpus(paths: List[Path]) -> List[bytes]:
+    corpus = []
+    for path in paths:
+        files = sorted(path.rglob("*.musicxml")) if path.is_dir() else [path]
+        corpus.extend(file.read_bytes() for file in files)
+    return corpus
+
+
+def time_operation(operation: Callable[[], None], repeat: int) -> float:
+    """Median wall time of ``repeat`` runs of ``operation``, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def benchmark_backend(xml: XmlBackend, corpus: List[bytes], repeat: int) -> Dict[str, float]:
+    roots = [xml.fromstring(data) for data in corpus]
+
+    def parse() -> None:
+        for data in corpus:
+            xml.fromstring(data)
+
+    def stream() -> None:
+        for data in corpus:
+            for _ in xml.iterparse(io.BytesIO(data), events=("start", "end")):
+                pass
+
+    def query() -> None:
+        for root in roots:
+            for part in xml.findall(root, ".//part"):
+                for measure in xml.findall(part, "measure"):
+                    xml.findall(measure, "note")
+
+    def copy_parts() -> None:
+        for root in roots:
+            for part in xml.findall(root, ".//part"):
+                deepcopy(part)
+
+    def write() -> None:
+        for root in roots:
+            xml.ElementTree(root).write(io.BytesIO(), encoding="utf-8", xml_declaration=True)
+
+    return {
+        name: time_operation(operation, repeat)
+        for name, operation in [
+            ("parse", parse),
+            ("iterparse", stream),
+            ("query", query),
+            ("deepcopy", copy_parts),
+            ("write", write),
+        ]
+    }
+
+
+def main(args: Namespace) -> None:
+    corpus = load_corpus(args.corpus)
+    if not corpus:
+        raise ValueError("The corpus does not contain any MusicXML file")
+    size = sum(len(data) for data in corpus) / 1024**2
+    print(f"Corpus: {len(corpus)} files, {size:.1f} MB, median of {args.repeat} runs in ms")
+
+    results = {name: benchmark_backend(XmlBackend(name), corpus, args.repeat) for name in args.backends}
+    operations = list(next(iter(results.values())).keys())
+    print(f"{'operation':<12}" + "".join(f"{name:>12}" for name in results))
+    for operation in operations:
+        print(f"{operation:<12}" + "".join(f"{timings[operation]:>12.1f}" for timings in results.values()))
+
+
+def setup() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument('corpus', type=Path, nargs='*', default=[DEFAULT_CORPUS], help='MusicXML files or directories containing them')
+    parser.add_argument('--backends', nargs='+', choices=XML_BACKENDS, default=list(XML_BACKENDS), help='Backends to compare')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs of every operation')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(setup())
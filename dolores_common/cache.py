@@ -0,0 +1,209 @@
+"""Persistent on-disk cache for backend responses."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 2 * 1024**3
+
+
+class ResponseCache:
+    """Content-addressed store of response bodies with LRU eviction.
+
+    Bodies are stored once per content hash under ``root/objects`` and referenced by
+    any number of keys. Keys are arbitrary strings, which callers build from the
+    request and the version of the data (see ``BackendClient``), so a new version of
+    a project simply produces new keys while the outdated ones age out of the cache.
+
+    The key index is a SQLite database under ``root`` so it can be shared by several
+    threads or processes.
+
+    Parameters
+    ----------
+    root : Path
+        Directory in which the cache lives. Created if it does not exist.
+    max_bytes : int
+        Size budget for stored bodies. When exceeded, the least recently used keys
+        are dropped until the cache fits again.
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DEFAULT_CACHE_SIZE) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.objects_path = self.root / "objects"
+        self.objects_path.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.root / "index.sqlite",
+            timeout=60.0,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS objects "
+            "(digest TEXT PRIMARY KEY, size INTEGER NOT NULL, refs INTEGER NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries "
+            "(key TEXT PRIMARY KEY, digest TEXT NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS entries_access ON entries (last_access)"
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"root": self.root, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        # Reopen the index, connections cannot be shared between processes
+        self.__init__(state["root"], state["max_bytes"])
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_path / digest[:2] / digest[2:]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT 1 FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        return row is not None
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get the body stored under ``key``, or None if it is not cached."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT digest FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+
+        try:
+            data = self._object_path(row[0]).read_bytes()
+        except FileNotFoundError:
+            _LOGGER.warning(f"Cache object for {key} is missing, dropping entry")
+            with self._lock:
+                self._drop_entry(key)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``, replacing any previous value."""
+        digest = hashlib.sha256(data).hexdigest()
+        obj_path = self._object_path(digest)
+
+        if not obj_path.exists():
+            self._write_object(obj_path, data)
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Another thread or process may have dropped the same object since,
+                # it cannot do so any more while this transaction holds the index
+                if not obj_path.exists():
+                    self._write_object(obj_path, data)
+
+                current = self._db.execute(
+                    "SELECT digest FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if current is not None and current[0] == digest:
+                    self._db.execute(
+                        "UPDATE entries SET last_access = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+                    self._db.execute("COMMIT")
+                    return
+
+                self._drop_entry(key)
+                self._db.execute(
+                    "INSERT INTO objects (digest, size, refs) VALUES (?, ?, 1) "
+                    "ON CONFLICT(digest) DO UPDATE SET refs = refs + 1",
+                    (digest, len(data)),
+                )
+                self._db.execute(
+                    "INSERT INTO entries (key, digest, last_access) VALUES (?, ?, ?)",
+                    (key, digest, time.time()),
+                )
+                self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _write_object(obj_path: Path, data: bytes) -> None:
+        obj_path.parent.mkdir(exist_ok=True)
+        # Unique temporary file, several writers of the same body may run at once
+        fd, tmp_name = tempfile.mkstemp(dir=obj_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f_out:
+                f_out.write(data)
+            # Whichever writer renames last wins, the bodies are identical anyway
+            os.replace(tmp_name, obj_path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    def _drop_entry(self, key: str) -> None:
+        row = self._db.execute(
+            "SELECT digest FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return
+        self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+        self._db.execute("UPDATE objects SET refs = refs - 1 WHERE digest = ?", row)
+
+        refs = self._db.execute(
+            "SELECT refs FROM objects WHERE digest = ?", row
+        ).fetchone()
+        if refs is not None and refs[0] <= 0:
+            self._db.execute("DELETE FROM objects WHERE digest = ?", row)
+            self._object_path(row[0]).unlink(missing_ok=True)
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM objects")
+        total = total.fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        oldest = self._db.execute(
+            "SELECT entries.key, entries.digest, objects.size FROM entries "
+            "JOIN objects ON entries.digest = objects.digest "
+            "ORDER BY entries.last_access"
+        ).fetchall()
+        for key, digest, size in oldest:
+            if total <= self.max_bytes:
+                break
+            self._drop_entry(key)
+            still_referenced = self._db.execute(
+                "SELECT 1 FROM objects WHERE digest = ?", (digest,)
+            ).fetchone()
+            if still_referenced is None:
+                total -= size
+        _LOGGER.debug(f"Evicted cache down to {total} bytes")
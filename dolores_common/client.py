@@ -0,0 +1,462 @@
+"""HTTP client for the DoLoReS backend shared by the command line tools."""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import ResponseCache
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fields of the /lines/{project_id} response that identify the revision of a project.
+# The first one present is used, falling back to the ETag or Last-Modified headers.
+VERSION_FIELDS = ("version", "last_modified", "updated_at", "modified")
+
+# Responses meaning the backend does not implement the bulk endpoint
+BULK_UNSUPPORTED_STATUS = (404, 405, 501)
+
+# Responses worth retrying: rate limiting and server side errors
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+@dataclass
+class EndpointStats:
+    """Counters of the requests made to one backend endpoint."""
+
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    reauths: int = 0
+    total_time: float = 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_time / self.requests if self.requests else 0.0
+
+
+class BackendClient:
+    """Thin wrapper around the DoLoReS backend REST API.
+
+    All requests go through a single keep-alive session whose connection pool is sized
+    to the number of concurrent workers, so the client can be shared by the threads of
+    a prefetcher without opening a new connection per request.
+
+    Parameters
+    ----------
+    base_url : str
+        Root URL of the backend.
+    username : str
+        Backend user name.
+    password : str
+        Backend password.
+    max_connections : int
+        Size of the connection pool. Should be at least the number of threads that
+        share the client.
+    timeout : float
+        Timeout in seconds for every request.
+    cache : ResponseCache | None
+        Optional on-disk cache. MusicXML, alignment and image responses are stored
+        keyed by project, line and the project revision reported by
+        ``/lines/{project_id}``, so they are only downloaded again when the project
+        changes. Projects without a revision are never served from the cache.
+        The client can be pickled to hand it to worker processes, which open their
+        own connections and cache index.
+    offline : bool
+        Serve everything from ``cache`` and never touch the network. Requests that
+        are not cached fail as if the backend had returned an error.
+    max_retries : int
+        Number of times a request is retried after a timeout, a connection error or
+        a 429/5xx response, waiting ``backoff * 2**attempt`` seconds in between.
+        A 401 response triggers a new authentication and one more attempt, so runs
+        outliving the token keep working.
+    backoff : float
+        Initial wait between retries, in seconds.
+    bulk : bool
+        Try to download whole projects in one request with ``fetch_bulk``. Turned
+        off automatically the first time the backend reports it does not support it.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        max_connections: int = 8,
+        timeout: float = 60.0,
+        cache: Optional[ResponseCache] = None,
+        offline: bool = False,
+        max_retries: int = 4,
+        backoff: float = 0.5,
+        bulk: bool = True,
+    ) -> None:
+        self.base_url = base_url
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bulk = bulk
+        self.access_token: Optional[str] = None
+        self.stats: Dict[str, EndpointStats] = {}
+
+        if offline and cache is None:
+            raise ValueError("Offline mode requires a response cache")
+        self.cache = cache
+        self.offline = offline
+        self.versions: Dict[int, str] = {}
+
+        self.session = self._new_session()
+        self._auth_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sessions hold open sockets, every process builds its own pool
+        state = self.__dict__.copy()
+        del state["session"], state["_auth_lock"], state["_stats_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.session = self._new_session()
+        self._auth_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def _new_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_connections,
+            pool_maxsize=self.max_connections,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def authenticate(self) -> None:
+        if self.offline:
+            return
+        url = f"{self.base_url}/token"
+        data = {
+            "grant_type": "password",
+            "username": self.username,
+            "password": self.password,
+            "scope": "",
+            "client_id": "",
+            "client_secret": "",
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        try:
+            response = self.session.post(
+                url, data=data, headers=headers, timeout=self.timeout
+            )
+            response.raise_for_status()
+            self.access_token = response.json().get("access_token")
+            if not self.access_token:
+                raise Exception("No access_token in response")
+        except Exception as e:
+            print(f"Error authenticating with backend: {e}")
+            self.access_token = None
+
+    def _get(self, path: str) -> requests.Response:
+        endpoint = self._endpoint(path)
+        attempt = 0
+        reauthenticated = False
+        while True:
+            token = self.access_token
+            headers = {}
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+
+            start = time.perf_counter()
+            try:
+                response = self.session.get(
+                    f"{self.base_url}{path}", headers=headers, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response = None
+                error: Exception = e
+            self._count(endpoint, time.perf_counter() - start, response)
+
+            if response is not None:
+                if response.status_code == 401 and not reauthenticated:
+                    reauthenticated = True
+                    self._reauthenticate(token)
+                    self._count_event(endpoint, "reauths")
+                    continue
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(
+                    f"{response.status_code} for {path}", response=response
+                )
+
+            if attempt >= self.max_retries:
+                raise error
+            delay = self.backoff * 2**attempt
+            _LOGGER.warning(f"Retrying {path} in {delay:.1f}s after: {error}")
+            self._count_event(endpoint, "retries")
+            time.sleep(delay)
+            attempt += 1
+
+    def _reauthenticate(self, rejected_token: Optional[str]) -> None:
+        # Only the first thread to see the expired token authenticates again
+        with self._auth_lock:
+            if self.access_token == rejected_token:
+                self.authenticate()
+
+    @staticmethod
+    def _endpoint(path: str) -> str:
+        path = path.split("?", 1)[0]
+        return "/".join(seg for seg in path.split("/") if not seg.isdigit()) or "/"
+
+    def _count(
+        self, endpoint: str, elapsed: float, response: Optional[requests.Response]
+    ) -> None:
+        with self._stats_lock:
+            stats = self.stats.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            stats.total_time += elapsed
+            if response is None or response.status_code >= 400:
+                stats.errors += 1
+
+    def _count_event(self, endpoint: str, field: str) -> None:
+        with self._stats_lock:
+            stats = self.stats.setdefault(endpoint, EndpointStats())
+            setattr(stats, field, getattr(stats, field) + 1)
+
+    def stats_report(self) -> List[str]:
+        """Describe the requests made to every endpoint, one line per endpoint."""
+        with self._stats_lock:
+            return [
+                f"{endpoint}: {stats.requests} requests, {stats.errors} errors, "
+                f"{stats.retries} retries, {stats.reauths} reauthentications, "
+                f"{stats.mean_latency * 1000:.0f} ms mean latency"
+                for endpoint, stats in sorted(self.stats.items())
+            ]
+
+    def _cached(
+        self,
+        key: str,
+        download: Callable[[], bytes],
+        version: Optional[str] = "",
+    ) -> bytes:
+        """Get a response body from the cache or download it and cache it.
+
+        Parameters
+        ----------
+        key : str
+            Cache key of the request, without the version.
+        download : Callable[[], bytes]
+            Function performing the request. Should raise on failure.
+        version : Optional[str]
+            Revision of the data. The empty string caches the latest response under
+            ``key`` regardless of revision, which is only ever read when offline.
+            None disables caching.
+
+        Returns
+        -------
+        bytes
+            The body of the response.
+        """
+        if self.cache is None or version is None:
+            if self.offline:
+                raise LookupError(f"{key} has no known version to look up offline")
+            return download()
+
+        full_key = f"{key}@{version}" if version else key
+        if version or self.offline:
+            data = self.cache.get(full_key)
+            if data is not None:
+                return data
+            if self.offline:
+                raise LookupError(f"{full_key} is not cached")
+
+        data = download()
+        self.cache.put(full_key, data)
+        return data
+
+    def _project_version(
+        self, lines_info: Dict[str, Any], response: Optional[requests.Response]
+    ) -> Optional[str]:
+        for field in VERSION_FIELDS:
+            if lines_info.get(field) is not None:
+                return str(lines_info[field])
+        if response is not None:
+            return response.headers.get("ETag") or response.headers.get(
+                "Last-Modified"
+            )
+        return None
+
+    def fetch_projects(self) -> Dict[int, str]:
+        try:
+            data = self._cached("projects", lambda: self._get("/projects").content)
+            projects = json.loads(data)
+            return {proj["project_id"]: proj["project_name"] for proj in projects}
+        except Exception as e:
+            print(f"Error fetching projects from backend: {e}")
+            return {}
+
+    def fetch_lines(self, project_id: int) -> Optional[Dict[str, Any]]:
+        response = None
+
+        def download() -> bytes:
+            nonlocal response
+            response = self._get(f"/lines/{project_id}")
+            return response.content
+
+        try:
+            lines_info = json.loads(self._cached(f"lines/{project_id}", download))
+        except Exception as e:
+            print(f"Error fetching lines for project {project_id}: {e}")
+            return None
+
+        version = self._project_version(lines_info, response)
+        if self.cache is not None:
+            # Header-based revisions are not part of the cached body, keep them apart
+            if self.offline and version is None:
+                cached_version = self.cache.get(f"version/{project_id}")
+                version = cached_version.decode() if cached_version else None
+            elif not self.offline and version is not None:
+                self.cache.put(f"version/{project_id}", version.encode())
+
+        if version is None:
+            self.versions.pop(project_id, None)
+        else:
+            self.versions[project_id] = version
+        return lines_info
+
+    def fetch_musicxml(self, project_id: int, line_id: int) -> Optional[bytes]:
+        try:
+            return self._cached(
+                f"musicxml/{project_id}/{line_id}",
+                lambda: self._get(
+                    f"/transcription/musicxml/{project_id}/{line_id}"
+                ).content,
+                self.versions.get(project_id),
+            )
+        except Exception as e:
+            print(
+                f"Error fetching musicxml for project {project_id}, line {line_id}: {e}"
+            )
+            return None
+
+    def fetch_alignment(
+        self, project_id: int, line_id: int
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            data = self._cached(
+                f"alignment/{project_id}/{line_id}",
+                lambda: self._get(f"/alignment/{project_id}/{line_id}").content,
+                self.versions.get(project_id),
+            )
+            return json.loads(data)
+        except Exception as e:
+            print(
+                f"Error fetching alignment for project {project_id}, line {line_id}: {e}"
+            )
+            return None
+
+    def fetch_image(self, project_id: int) -> Optional[bytes]:
+        try:
+            return self._cached(
+                f"image/{project_id}",
+                lambda: self._get(f"/image/{project_id}").content,
+                self.versions.get(project_id),
+            )
+        except Exception as e:
+            print(f"Error fetching image for project {project_id}: {e}")
+            return None
+
+    def fetch_bulk(
+        self, project_id: int, line_ids: List[int], with_alignment: bool = True
+    ) -> Optional[Tuple[Dict[int, Optional[bytes]], Dict[int, Optional[Dict[str, Any]]]]]:
+        """Download the MusicXML and alignment of several lines of a project at once.
+
+        The backend streams one JSON object per line (NDJSON) with the fields
+        ``line_id``, ``musicxml`` and, if requested, ``alignment``. The responses are
+        stored in the cache under the same keys as the per-line requests.
+
+        Parameters
+        ----------
+        project_id : int
+            Project to download. ``fetch_lines`` must have been called on it.
+        line_ids : List[int]
+            Lines to return.
+        with_alignment : bool
+            Whether to download the alignments too.
+
+        Returns
+        -------
+        Tuple[Dict[int, Optional[bytes]], Dict[int, Optional[Dict[str, Any]]]] | None
+            The MusicXML and alignment of every line, None for lines missing from
+            the response or whose record is malformed, which the caller should
+            request one by one. The alignments are empty if not requested. None if
+            the caller should fall back to per-line requests: bulk mode is off or
+            not supported, the request failed, or every line is already cached.
+        """
+        if not self.bulk or self.offline or not line_ids:
+            return None
+        version = self.versions.get(project_id)
+        if self.cache is not None and version is not None:
+            if all(
+                f"musicxml/{project_id}/{line_id}@{version}" in self.cache
+                for line_id in line_ids
+            ):
+                return None
+
+        query = "?alignment=1" if with_alignment else ""
+        try:
+            response = self._get(f"/transcription/bulk/{project_id}{query}")
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code in BULK_UNSUPPORTED_STATUS:
+                _LOGGER.info("The backend has no bulk endpoint, using per-line requests")
+                self.bulk = False
+            else:
+                print(f"Error fetching lines of project {project_id} in bulk: {e}")
+            return None
+        except Exception as e:
+            print(f"Error fetching lines of project {project_id} in bulk: {e}")
+            return None
+
+        musicxml: Dict[int, Optional[bytes]] = {line_id: None for line_id in line_ids}
+        alignment: Dict[int, Optional[Dict[str, Any]]] = {}
+        if with_alignment:
+            alignment = {line_id: None for line_id in line_ids}
+        for record_line in response.content.splitlines():
+            if not record_line.strip():
+                continue
+            try:
+                record = json.loads(record_line)
+                line_id = record["line_id"]
+                if line_id not in musicxml or record.get("musicxml") is None:
+                    continue
+                line_musicxml = record["musicxml"].encode("utf-8")
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # The line stays None so the caller requests it on its own
+                _LOGGER.warning(
+                    f"Skipping malformed record in bulk response of project "
+                    f"{project_id}: {e}"
+                )
+                continue
+            musicxml[line_id] = line_musicxml
+            if with_alignment:
+                alignment[line_id] = record.get("alignment")
+
+            if self.cache is not None and version is not None:
+                self.cache.put(
+                    f"musicxml/{project_id}/{line_id}@{version}", musicxml[line_id]
+                )
+                if alignment.get(line_id) is not None:
+                    self.cache.put(
+                        f"alignment/{project_id}/{line_id}@{version}",
+                        json.dumps(alignment[line_id]).encode(),
+                    )
+        return musicxml, alignment
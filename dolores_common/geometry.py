@@ -0,0 +1,151 @@
+"""Lightweight points and boxes, with batched operations on coordinate arrays.
+
+Points and boxes are ``__slots__`` classes, which are allocated by the thousand when
+parsing SVG scores and annotation polygons. Operations over many of them at once
+work on ``(N, 2)`` arrays of ``x, y`` coordinates instead.
+"""
+
+from __future__ import annotations
+
+from math import sqrt
+from typing import Iterable, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+Number = Union[int, float]
+
+
+class Point:
+    """A point in image or SVG coordinates. Compared by value and mutable in place."""
+
+    __slots__ = ("x", "y")
+
+    def __init__(self, x: Number, y: Number) -> None:
+        self.x = x
+        self.y = y
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(x={self.x!r}, y={self.y!r})"
+
+    def __str__(self) -> str:
+        return f"{self.x},{self.y}"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    __hash__ = None  # Mutable
+
+    def __add__(self, point: Point) -> Point:
+        return Point(self.x + point.x, self.y + point.y)
+
+    def __iadd__(self, point: Point) -> Point:
+        self.x += point.x
+        self.y += point.y
+
+        return self
+
+    def __mul__(self, factor: float) -> Point:
+        return Point(int(self.x * factor), int(self.y * factor))
+
+    def __imul__(self, factor: float) -> Point:
+        self.x = int(self.x * factor)
+        self.y = int(self.y * factor)
+
+        return self
+
+    def as_tuple(self) -> Tuple[Number, Number]:
+        return self.x, self.y
+
+    def dist(self, other: Point) -> float:
+        return sqrt((other.x - self.x) ** 2 + (other.y - self.y) ** 2)
+
+
+class BoundingBox:
+    """Axis aligned box between its top left and bottom right corners."""
+
+    __slots__ = ("tl", "br")
+
+    def __init__(self, tl: Point, br: Point) -> None:
+        self.tl = tl
+        self.br = br
+
+    def __str__(self) -> str:
+        return f"TL: {self.tl.x}, {self.tl.y} BR: {self.br.x}, {self.br.y}"
+
+    def __repr__(self) -> str:
+        return str(self)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BoundingBox):
+            return NotImplemented
+        return self.tl == other.tl and self.br == other.br
+
+    __hash__ = None  # Mutable
+
+    def __iter__(self) -> Iterator[Point]:
+        yield from (self.tl, self.br)
+
+    @property
+    def width(self) -> Number:
+        return self.br.x - self.tl.x
+
+    @property
+    def height(self) -> Number:
+        return self.br.y - self.tl.y
+
+    @classmethod
+    def from_array(cls, coords: np.ndarray) -> BoundingBox:
+        """Build a box from a ``[x0, y0, x1, y1]`` array."""
+        x0, y0, x1, y1 = coords.tolist()
+        return cls(Point(x0, y0), Point(x1, y1))
+
+    def as_array(self) -> np.ndarray:
+        return np.array([self.tl.x, self.tl.y, self.br.x, self.br.y])
+
+    def offset(self, point: Point) -> None:
+        self.tl += point
+        self.br += point
+
+    def scale(self, factor: float) -> BoundingBox:
+        return type(self)(self.tl * factor, self.br * factor)
+
+    def union(self, other: BoundingBox) -> BoundingBox:
+        return type(self)(
+            Point(min(self.tl.x, other.tl.x), min(self.tl.y, other.tl.y)),
+            Point(max(self.br.x, other.br.x), max(self.br.y, other.br.y)),
+        )
+
+
+def points_to_array(points: Iterable[Point]) -> np.ndarray:
+    """Stack points into an ``(N, 2)`` array of coordinates."""
+    return np.array([point.as_tuple() for point in points]).reshape(-1, 2)
+
+
+def array_to_points(coords: np.ndarray) -> List[Point]:
+    """Build a point from every row of an ``(N, 2)`` array of coordinates."""
+    return [Point(x, y) for x, y in coords.tolist()]
+
+
+def flat_to_array(flat: Sequence[Number]) -> np.ndarray:
+    """Pair up ``[x0, y0, x1, y1, ...]`` coordinates into an ``(N, 2)`` array.
+
+    A trailing unpaired coordinate is dropped.
+    """
+    coords = np.asarray(flat)
+    return coords[: len(coords) // 2 * 2].reshape(-1, 2)
+
+
+def scale_coords(coords: np.ndarray, factor: float) -> np.ndarray:
+    """Scale coordinates, truncating them to integers like ``Point.__mul__``."""
+    return (coords * factor).astype(np.int64)
+
+
+def bbox_union(coords: np.ndarray) -> BoundingBox:
+    """Smallest box containing every row of an ``(N, 2)`` array of coordinates."""
+    if len(coords) == 0:
+        raise ValueError("Cannot bound an empty set of points")
+    x0, y0 = coords.min(axis=0).tolist()
+    x1, y1 = coords.max(axis=0).tolist()
+    return BoundingBox(Point(x0, y0), Point(x1, y1))
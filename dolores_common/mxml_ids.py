@@ -0,0 +1,143 @@
+"""Index from MusicXML element ids to the alignment annotations that refer to them."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Set
+
+
+class MxmlIdIndex:
+    """Find which owners (typically parts) a dotted annotation id belongs to.
+
+    Alignment annotations reference MusicXML elements through ids such as
+    ``note12.dot1`` or ``note12.notehead``, where the part before a dot is the id of
+    an element in the MusicXML file. An annotation belongs to an owner if its id is
+    the id of one of the owner's elements, or starts with one of them followed by a
+    dot.
+
+    Element ids are kept in a hash map, so resolving an annotation id only looks up
+    each of its dotted prefixes, which is linear in the length of the id and does not
+    depend on the number of elements in the score.
+    """
+
+    def __init__(self) -> None:
+        self._owners: Dict[str, Set[Hashable]] = {}
+
+    @classmethod
+    def from_parts(cls, parts: Iterable[Any]) -> MxmlIdIndex:
+        """Build an index whose owners are the positions of ``parts``.
+
+        Parameters
+        ----------
+        parts : Iterable[Element]
+            MusicXML part elements. Every element with an ``id`` attribute within a
+            part (the part itself included) is assigned to the index of the part.
+
+        Returns
+        -------
+        MxmlIdIndex
+            The populated index.
+        """
+        index = cls()
+        for idx, part in enumerate(parts):
+            for elem in part.iter():
+                elem_id = elem.attrib.get("id")
+                if elem_id:
+                    index.add(elem_id, idx)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, elem_id: str) -> bool:
+        return elem_id in self._owners
+
+    def add(self, elem_id: str, owner: Hashable) -> None:
+        """Register that ``elem_id`` is owned by ``owner``."""
+        self._owners.setdefault(elem_id, set()).add(owner)
+
+    def owners(self, ann_id: str) -> Set[Hashable]:
+        """Get every owner of an annotation id.
+
+        Parameters
+        ----------
+        ann_id : str
+            The ``mxml_id`` of an alignment annotation.
+
+        Returns
+        -------
+        Set[Hashable]
+            Owners of the element the annotation refers to. Empty if it refers to no
+            indexed element.
+        """
+        output: Set[Hashable] = set()
+        for prefix in self._prefixes(ann_id):
+            output.update(self._owners.get(prefix, ()))
+        return output
+
+    def group_annotations(
+        self,
+        annotations: Iterable[Dict[str, Any]],
+        owners: Iterable[Hashable],
+        key: str = "mxml_id",
+    ) -> Dict[Hashable, Dict[str, Any]]:
+        """Split the annotations of an alignment among their owners.
+
+        Parameters
+        ----------
+        annotations : Iterable[Dict[str, Any]]
+            Annotations as returned by the alignment endpoint.
+        owners : Iterable[Hashable]
+            Owners to produce an entry for, even if they end up without annotations.
+        key : str
+            Name of the annotation field holding the MusicXML id.
+
+        Returns
+        -------
+        Dict[Hashable, Dict[str, Any]]
+            For every owner, a mapping from annotation id to annotation in the order
+            the annotations were given.
+        """
+        output: Dict[Hashable, Dict[str, Any]] = {owner: {} for owner in owners}
+        for ann in annotations:
+            ann_id = ann.get(key)
+            if not ann_id:
+                continue
+            for owner in self.owners(ann_id):
+                output.setdefault(owner, {})[ann_id] = ann
+        return output
+
+    @staticmethod
+    def _prefixes(ann_id: str) -> Iterator[str]:
+        yield ann_id
+        cut = ann_id.rfind(".")
+        while cut >= 0:
+            yield ann_id[:cut]
+            cut = ann_id.rfind(".", 0, cut)
+
+
+def split_alignment_by_part(
+    parts: List[Any], alignment: Dict[str, Any] | None
+) -> List[Dict[str, Any]]:
+    """Map the annotation ids of a line alignment to their bounding boxes per part.
+
+    Parameters
+    ----------
+    parts : List[Element]
+        MusicXML part elements of the line.
+    alignment : Dict[str, Any] | None
+        Alignment of the line as returned by the backend.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        One ``mxml_id -> bbox`` dictionary per part, in the order of ``parts``.
+    """
+    if not alignment or "annotations" not in alignment:
+        return [{} for _ in parts]
+
+    index = MxmlIdIndex.from_parts(parts)
+    grouped = index.group_annotations(alignment["annotations"], range(len(parts)))
+    return [
+        {ann_id: ann.get("bbox") for ann_id, ann in grouped[idx].items()}
+        for idx in range(len(parts))
+    ]
@@ -0,0 +1,159 @@
+"""Concurrent prefetching of per-project backend data."""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+from .client import BackendClient
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class ProjectData:
+    """Everything downloaded for a single project before it is processed."""
+
+    project_id: int
+    project_name: str
+    lines_info: Optional[Dict[str, Any]]
+    musicxml: Dict[int, Optional[bytes]] = field(default_factory=dict)
+    alignment: Dict[int, Optional[Dict[str, Any]]] = field(default_factory=dict)
+
+
+class ProjectPrefetcher:
+    """Download the lines, MusicXML and alignment of many projects at once.
+
+    Projects are yielded in the same order they were requested, but up to
+    ``lookahead`` of them are being downloaded in the background while the caller
+    processes the current one. Individual requests run on a pool of ``max_workers``
+    threads, which is the effective concurrency limit against the backend.
+
+    Parameters
+    ----------
+    client : BackendClient
+        Client used to perform the requests. Its connection pool should be at least
+        ``max_workers + lookahead`` connections wide.
+    max_workers : int
+        Maximum number of requests in flight.
+    lookahead : int
+        Maximum number of projects downloaded ahead of the consumer.
+    with_alignment : bool
+        Whether to download the alignment of every line as well.
+    skip_line : Callable[[int, int], bool] | None
+        Called with the project and line ids once the lines of a project are known.
+        Lines for which it returns True are not downloaded and are missing from the
+        ``musicxml`` and ``alignment`` of the project.
+    """
+
+    def __init__(
+        self,
+        client: BackendClient,
+        max_workers: int = 8,
+        lookahead: int = 4,
+        with_alignment: bool = True,
+        skip_line: Optional[Callable[[int, int], bool]] = None,
+    ) -> None:
+        self.client = client
+        self.max_workers = max(1, max_workers)
+        self.lookahead = max(1, lookahead)
+        self.with_alignment = with_alignment
+        self.skip_line = skip_line
+
+    def iter_projects(self, projects: Dict[int, str]) -> Iterator[ProjectData]:
+        """Yield the data of every project in ``projects`` in order.
+
+        Parameters
+        ----------
+        projects : Dict[int, str]
+            Mapping from project id to project name.
+
+        Yields
+        ------
+        ProjectData
+            The downloaded data of the next project.
+        """
+        with ThreadPoolExecutor(
+            self.max_workers, thread_name_prefix="fetch"
+        ) as request_pool, ThreadPoolExecutor(
+            self.lookahead, thread_name_prefix="project"
+        ) as project_pool:
+            pending: Deque[Future[ProjectData]] = deque()
+            project_iter = iter(projects.items())
+
+            def fill() -> None:
+                while len(pending) < self.lookahead:
+                    try:
+                        project_id, project_name = next(project_iter)
+                    except StopIteration:
+                        return
+                    pending.append(
+                        project_pool.submit(
+                            self._load, request_pool, project_id, project_name
+                        )
+                    )
+
+            fill()
+            while pending:
+                data = pending.popleft().result()
+                fill()
+                yield data
+
+    def _load(
+        self,
+        request_pool: ThreadPoolExecutor,
+        project_id: int,
+        project_name: str,
+    ) -> ProjectData:
+        lines_info = self.client.fetch_lines(project_id)
+        data = ProjectData(project_id, project_name, lines_info)
+
+        if not lines_info or "line_ids" not in lines_info:
+            return data
+
+        line_ids = lines_info["line_ids"]
+        if self.skip_line is not None:
+            line_ids = [
+                line_id
+                for line_id in line_ids
+                if not self.skip_line(project_id, line_id)
+            ]
+
+        # One request for the whole project when the backend supports it
+        bulk = self.client.fetch_bulk(project_id, line_ids, self.with_alignment)
+        if bulk is not None:
+            data.musicxml, data.alignment = bulk
+            # Lines left out of the bulk response are requested one by one
+            line_ids = [
+                line_id for line_id in line_ids if data.musicxml.get(line_id) is None
+            ]
+            _LOGGER.debug(
+                f"Fetched {len(data.musicxml) - len(line_ids)} lines of "
+                f"{project_name} in bulk"
+            )
+            if not line_ids:
+                return data
+
+        mxml_futures = {
+            line_id: request_pool.submit(
+                self.client.fetch_musicxml, project_id, line_id
+            )
+            for line_id in line_ids
+        }
+        alignment_futures = {}
+        if self.with_alignment:
+            alignment_futures = {
+                line_id: request_pool.submit(
+                    self.client.fetch_alignment, project_id, line_id
+                )
+                for line_id in line_ids
+            }
+
+        data.musicxml.update({k: v.result() for k, v in mxml_futures.items()})
+        data.alignment.update({k: v.result() for k, v in alignment_futures.items()})
+        _LOGGER.debug(f"Prefetched {len(data.musicxml)} lines of {project_name}")
+
+        return data
@@ -0,0 +1,272 @@
+"""Run the tools from a local snapshot of the backend data instead of the backend.
+
+Two layouts are understood:
+
+* The backend layout, also served by ``standin_server`` and written by
+  ``export_snapshot``::
+
+    SNAPSHOT/projects.json                      [{"project_id": ..., "project_name": ...}]
+    SNAPSHOT/{project_id}/lines.json            /lines/{project_id} response
+    SNAPSHOT/{project_id}/image.{jpg,png,...}   page image
+    SNAPSHOT/{project_id}/{line_id}.musicxml
+    SNAPSHOT/{project_id}/{line_id}.alignment.json
+
+* The flat layout of the doloresdb extraction scripts, a directory (or its
+  ``MusicXML`` subdirectory) of ``{project_name}.{line}.musicxml`` files. It has no
+  images, alignments or line coordinates, so it is only useful for validation.
+  Projects get consecutive ids in the order of their names.
+
+Usage: ``python -m dolores_common.snapshot BACKEND_URL USERNAME OUTPUT`` exports
+the backend to a snapshot in the first layout.
+"""
+
+from __future__ import annotations
+
+import getpass
+import json
+import re
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from .client import VERSION_FIELDS, BackendClient
+
+RE_FLAT_MUSICXML = re.compile(r"^(?P<project>.+)\.(?P<line>\d+)\.musicxml$")
+
+
+class DataSource(Protocol):
+    """What the tools need from the backend, implemented by ``BackendClient``."""
+
+    versions: Dict[int, str]
+
+    def authenticate(self) -> None: ...
+
+    def fetch_projects(self) -> Dict[int, str]: ...
+
+    def fetch_lines(self, project_id: int) -> Optional[Dict[str, Any]]: ...
+
+    def fetch_musicxml(self, project_id: int, line_id: int) -> Optional[bytes]: ...
+
+    def fetch_alignment(self, project_id: int, line_id: int) -> Optional[Dict[str, Any]]: ...
+
+    def fetch_image(self, project_id: int) -> Optional[bytes]: ...
+
+    def fetch_bulk(
+        self, project_id: int, line_ids: List[int], with_alignment: bool = True
+    ) -> Optional[Tuple[Dict[int, Optional[bytes]], Dict[int, Optional[Dict[str, Any]]]]]: ...
+
+    def stats_report(self) -> List[str]: ...
+
+
+class SnapshotSource:
+    """Data source reading a snapshot directory, with the interface of ``BackendClient``.
+
+    Missing files are reported and returned as None, like failed requests.
+
+    Parameters
+    ----------
+    root : Path
+        Snapshot directory in either of the supported layouts.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        if not self.root.is_dir():
+            raise FileNotFoundError(f"Snapshot directory {self.root} does not exist")
+        self.cache = None
+        self.versions: Dict[int, str] = {}
+
+        # Project id -> (project name, line id -> MusicXML file) for the flat layout
+        self.flat: Optional[Dict[int, Tuple[str, Dict[int, Path]]]] = None
+        if not (self.root / "projects.json").is_file():
+            self.flat = self._index_flat()
+
+    def _index_flat(self) -> Dict[int, Tuple[str, Dict[int, Path]]]:
+        musicxml_dir = self.root / "MusicXML"
+        if not musicxml_dir.is_dir():
+            musicxml_dir = self.root
+
+        projects: Dict[str, Dict[int, Path]] = {}
+        for file in musicxml_dir.glob("*.musicxml"):
+            match = RE_FLAT_MUSICXML.match(file.name)
+            if match is not None:
+                lines = projects.setdefault(match.group("project"), {})
+                lines[int(match.group("line"))] = file
+        return {
+            project_id: (name, projects[name])
+            for project_id, name in enumerate(sorted(projects), start=1)
+        }
+
+    def authenticate(self) -> None:
+        pass
+
+    def stats_report(self) -> List[str]:
+        return []
+
+    def fetch_projects(self) -> Dict[int, str]:
+        if self.flat is not None:
+            return {project_id: name for project_id, (name, _) in self.flat.items()}
+        try:
+            projects = json.loads((self.root / "projects.json").read_bytes())
+            return {proj["project_id"]: proj["project_name"] for proj in projects}
+        except Exception as e:
+            print(f"Error reading projects from snapshot: {e}")
+            return {}
+
+    def fetch_lines(self, project_id: int) -> Optional[Dict[str, Any]]:
+        if self.flat is not None:
+            if project_id not in self.flat:
+                print(f"Error fetching lines for project {project_id}: not in snapshot")
+                return None
+            line_ids = sorted(self.flat[project_id][1])
+            return {"line_ids": line_ids, "line_coords": [None] * max(line_ids)}
+
+        try:
+            lines_info = json.loads((self.root / str(project_id) / "lines.json").read_bytes())
+        except Exception as e:
+            print(f"Error fetching lines for project {project_id}: {e}")
+            return None
+        for field in VERSION_FIELDS:
+            if lines_info.get(field) is not None:
+                self.versions[project_id] = str(lines_info[field])
+                break
+        return lines_info
+
+    def fetch_musicxml(self, project_id: int, line_id: int) -> Optional[bytes]:
+        try:
+            if self.flat is not None:
+                return self.flat[project_id][1][line_id].read_bytes()
+            return (self.root / str(project_id) / f"{line_id}.musicxml").read_bytes()
+        except Exception as e:
+            print(f"Error fetching musicxml for project {project_id}, line {line_id}: {e}")
+            return None
+
+    def fetch_alignment(self, project_id: int, line_id: int) -> Optional[Dict[str, Any]]:
+        if self.flat is not None:
+            return None
+        try:
+            path = self.root / str(project_id) / f"{line_id}.alignment.json"
+            return json.loads(path.read_bytes())
+        except Exception as e:
+            print(f"Error fetching alignment for project {project_id}, line {line_id}: {e}")
+            return None
+
+    def fetch_image(self, project_id: int) -> Optional[bytes]:
+        images = []
+        if self.flat is None:
+            images = sorted((self.root / str(project_id)).glob("image.*"))
+        if not images:
+            print(f"Error fetching image for project {project_id}: not in snapshot")
+            return None
+        return images[0].read_bytes()
+
+    def fetch_bulk(
+        self, project_id: int, line_ids: List[int], with_alignment: bool = True
+    ) -> Optional[Tuple[Dict[int, Optional[bytes]], Dict[int, Optional[Dict[str, Any]]]]]:
+        # Reading the files one by one is as fast as it gets
+        return None
+
+
+def open_data_source(
+    snapshot: Optional[Path],
+    backend_url: Optional[str],
+    username: Optional[str],
+    password: Optional[str],
+    **client_kwargs: Any,
+) -> DataSource:
+    """Get the data source the tools should read from.
+
+    Parameters
+    ----------
+    snapshot : Path | None
+        Snapshot directory. If given, the backend is never contacted.
+    backend_url, username, password : str | None
+        Backend credentials, usually from the tool's ``config.py``.
+    **client_kwargs
+        Extra arguments for ``BackendClient``.
+
+    Returns
+    -------
+    DataSource
+        A ``SnapshotSource`` or a ``BackendClient``, not yet authenticated.
+    """
+    if snapshot is not None:
+        return SnapshotSource(snapshot)
+    if backend_url is None:
+        raise ValueError("A config.py with the backend credentials is required unless a snapshot is given")
+    return BackendClient(backend_url, username, password, **client_kwargs)
+
+
+def export_snapshot(
+    client: BackendClient, root: Path, project_ids: Optional[Iterable[int]] = None
+) -> None:
+    """Download projects from the backend into a snapshot directory.
+
+    Parameters
+    ----------
+    client : BackendClient
+        Authenticated client.
+    root : Path
+        Output directory, in the backend layout. Existing files are overwritten.
+    project_ids : Iterable[int] | None
+        Projects to export. All of them by default.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    projects = client.fetch_projects()
+    if project_ids is not None:
+        wanted = set(project_ids)
+        projects = {pid: name for pid, name in projects.items() if pid in wanted}
+    (root / "projects.json").write_text(
+        json.dumps([{"project_id": pid, "project_name": name} for pid, name in projects.items()])
+    )
+
+    for project_id, project_name in projects.items():
+        print(f"Exporting: {project_name} (ID: {project_id})")
+        lines_info = client.fetch_lines(project_id)
+        if not lines_info:
+            continue
+        project_dir = root / str(project_id)
+        project_dir.mkdir(exist_ok=True)
+        (project_dir / "lines.json").write_text(json.dumps(lines_info))
+
+        image_bytes = client.fetch_image(project_id)
+        if image_bytes:
+            (project_dir / f"image{_image_suffix(image_bytes)}").write_bytes(image_bytes)
+
+        for line_id in lines_info.get("line_ids", []):
+            musicxml_bytes = client.fetch_musicxml(project_id, line_id)
+            if musicxml_bytes:
+                (project_dir / f"{line_id}.musicxml").write_bytes(musicxml_bytes)
+            alignment = client.fetch_alignment(project_id, line_id)
+            if alignment is not None:
+                (project_dir / f"{line_id}.alignment.json").write_text(json.dumps(alignment))
+
+
+def _image_suffix(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return ".png"
+    if data[:4] in (b"II*\x00", b"MM\x00*"):
+        return ".tif"
+    return ".jpg"
+
+
+def main(args: Namespace) -> None:
+    password = args.password if args.password is not None else getpass.getpass()
+    client = BackendClient(args.backend_url, args.username, password)
+    client.authenticate()
+    export_snapshot(client, args.output, args.projects)
+
+
+def setup() -> Namespace:
+    parser = ArgumentParser(description="Export the backend data to a snapshot directory.")
+    parser.add_argument('backend_url', type=str, help='Root URL of the backend')
+    parser.add_argument('username', type=str, help='Backend user name')
+    parser.add_argument('output', type=Path, help='Directory to write the snapshot to')
+    parser.add_argument('--password', type=str, default=None, help='Backend password, asked for if not given')
+    parser.add_argument('--projects', type=int, nargs='+', default=None, help='Ids of the projects to export, all by default')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(setup())
@@ -0,0 +1,153 @@
+"""Local stand-in for the DoLoReS backend serving a snapshot directory.
+
+Usage: ``python -m dolores_common.standin_server SNAPSHOT [--port 8000] [--no_bulk]``
+
+Point ``backend_url`` in the tools' ``config.py`` to the printed address to run them
+against the snapshot without touching the real backend. The snapshot layout is::
+
+    SNAPSHOT/projects.json                      [{"project_id": ..., "project_name": ...}]
+    SNAPSHOT/{project_id}/lines.json            /lines/{project_id} response
+    SNAPSHOT/{project_id}/image.{jpg,png,...}   page image
+    SNAPSHOT/{project_id}/{line_id}.musicxml
+    SNAPSHOT/{project_id}/{line_id}.alignment.json
+
+Any user name and password are accepted. Besides the per-line endpoints, the server
+implements the bulk endpoint used by ``BackendClient.fetch_bulk``, unless started
+with ``--no_bulk`` to emulate a backend without it.
+"""
+
+import json
+import mimetypes
+import re
+from argparse import ArgumentParser, Namespace
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+TOKEN = "standin-token"
+
+ROUTES = [
+    (re.compile(r"^/projects$"), "projects"),
+    (re.compile(r"^/lines/(\d+)$"), "lines"),
+    (re.compile(r"^/transcription/musicxml/(\d+)/(\d+)$"), "musicxml"),
+    (re.compile(r"^/alignment/(\d+)/(\d+)$"), "alignment"),
+    (re.compile(r"^/image/(\d+)$"), "image"),
+    (re.compile(r"^/transcription/bulk/(\d+)$"), "bulk"),
+]
+
+
+class SnapshotHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, *args, snapshot: Path, bulk: bool, **kwargs) -> None:
+        self.snapshot = snapshot
+        self.bulk = bulk
+        super().__init__(*args, **kwargs)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if urlsplit(self.path).path != "/token":
+            return self._send_error(404)
+        self._send(json.dumps({"access_token": TOKEN, "token_type": "bearer"}).encode())
+
+    def do_GET(self) -> None:
+        if self.headers.get("Authorization") != f"Bearer {TOKEN}":
+            return self._send_error(401)
+
+        url = urlsplit(self.path)
+        for pattern, route in ROUTES:
+            match = pattern.match(url.path)
+            if match is not None:
+                break
+        else:
+            return self._send_error(404)
+        if route == "bulk" and not self.bulk:
+            return self._send_error(404)
+
+        ids = match.groups()
+        if route == "projects":
+            return self._send_file(self.snapshot / "projects.json")
+        if route == "lines":
+            return self._send_file(self.snapshot / ids[0] / "lines.json")
+        if route == "musicxml":
+            return self._send_file(self.snapshot / ids[0] / f"{ids[1]}.musicxml")
+        if route == "alignment":
+            return self._send_file(self.snapshot / ids[0] / f"{ids[1]}.alignment.json")
+        if route == "image":
+            images = sorted((self.snapshot / ids[0]).glob("image.*"))
+            return self._send_file(images[0] if images else None)
+
+        with_alignment = parse_qs(url.query).get("alignment", ["0"])[0] in ("1", "true")
+        return self._send_bulk(ids[0], with_alignment)
+
+    def _send_bulk(self, project_id: str, with_alignment: bool) -> None:
+        lines_path = self.snapshot / project_id / "lines.json"
+        if not lines_path.is_file():
+            return self._send_error(404)
+        lines_info = json.loads(lines_path.read_bytes())
+
+        records = []
+        for line_id in lines_info.get("line_ids", []):
+            mxml_path = self.snapshot / project_id / f"{line_id}.musicxml"
+            if not mxml_path.is_file():
+                continue
+            record = {"line_id": line_id, "musicxml": mxml_path.read_text(encoding="utf-8")}
+            if with_alignment:
+                alignment_path = self.snapshot / project_id / f"{line_id}.alignment.json"
+                record["alignment"] = (
+                    json.loads(alignment_path.read_bytes()) if alignment_path.is_file() else None
+                )
+            records.append(json.dumps(record))
+        self._send("\n".join(records).encode(), "application/x-ndjson")
+
+    def _send_file(self, path: Optional[Path]) -> None:
+        if path is None or not path.is_file():
+            return self._send_error(404)
+        content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self._send(path.read_bytes(), content_type)
+
+    def _send_error(self, code: int) -> None:
+        self._send(json.dumps({"detail": self.responses[code][0]}).encode(), code=code)
+
+    def _send(self, body: bytes, content_type: str = "application/json", code: int = 200) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(snapshot: Path, host: str = "127.0.0.1", port: int = 8000, bulk: bool = True) -> ThreadingHTTPServer:
+    """Create a server for ``snapshot``. Call ``serve_forever`` on it to start serving."""
+    handler = partial(SnapshotHandler, snapshot=Path(snapshot), bulk=bulk)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(args: Namespace) -> None:
+    server = serve(args.snapshot, args.host, args.port, not args.no_bulk)
+    print(f"Serving {args.snapshot} at http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def setup() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument('snapshot', type=Path, help='Snapshot directory to serve')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--no_bulk', action='store_true', help='Do not implement the bulk endpoint')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(setup())
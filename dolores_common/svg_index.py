@@ -0,0 +1,67 @@
+"""Index of the elements of an SVG score by class and by id."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class SvgIndex:
+    """Find the elements of an SVG score by class or id in constant time.
+
+    The index is a snapshot of the elements it was given: elements added, removed
+    or renamed afterwards are not reflected. Classes are indexed by the whole value
+    of the ``class`` attribute, as in the XPath test ``[@class='...']``, so a group
+    with class ``"ending systemMilestone"`` is only found under that exact name.
+
+    Parameters
+    ----------
+    elements : Iterable[Element]
+        Elements to index, in document order.
+    """
+
+    def __init__(self, elements: Iterable[Any] = ()) -> None:
+        self._by_class: Dict[str, List[Any]] = {}
+        self._by_id: Dict[str, Any] = {}
+
+        for element in elements:
+            self.add(element)
+
+    @classmethod
+    def from_tree(cls, root: Any, tag: Optional[str] = None) -> SvgIndex:
+        """Index every element below ``root``.
+
+        Parameters
+        ----------
+        root : Element
+            Root of the lxml tree to index. It is not indexed itself.
+        tag : str | None
+            Only index elements with this qualified tag, such as
+            ``"{http://www.w3.org/2000/svg}g"``. Every element by default.
+
+        Returns
+        -------
+        SvgIndex
+            The populated index.
+        """
+        return cls(root.iterdescendants(tag))
+
+    def add(self, element: Any) -> None:
+        """Index one more element. Earlier elements keep their ids."""
+        element_class = element.get("class")
+        if element_class is not None:
+            self._by_class.setdefault(element_class, []).append(element)
+
+        element_id = element.get("id")
+        if element_id is not None:
+            self._by_id.setdefault(element_id, element)
+
+    def classes(self) -> List[str]:
+        return list(self._by_class)
+
+    def by_class(self, element_class: str) -> List[Any]:
+        """Elements with exactly this class, in the order they were indexed."""
+        return self._by_class.get(element_class, [])
+
+    def by_id(self, element_id: str) -> Optional[Any]:
+        """First element with this id, or None."""
+        return self._by_id.get(element_id)
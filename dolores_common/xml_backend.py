@@ -0,0 +1,95 @@
+"""Selectable ElementTree implementation for parsing and writing MusicXML."""
+
+from __future__ import annotations
+
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, Iterator, List, Tuple
+
+XML_BACKENDS = ("etree", "lxml")
+
+
+class XmlBackend:
+    """Parse, query and build MusicXML trees with either ElementTree or lxml.
+
+    Both backends produce the same trees for MusicXML: comments and processing
+    instructions are dropped and the DTD referenced by the doctype is never loaded.
+    The lxml backend reuses a single configured parser and evaluates queries with
+    precompiled XPath expressions.
+
+    Trees from different backends cannot be mixed, so new elements must be created
+    with ``Element`` and trees wrapped with ``ElementTree`` from the same backend.
+    A backend is not meant to be shared by several threads, but it can be pickled
+    to hand it to worker processes.
+
+    Parameters
+    ----------
+    name : str
+        Either "etree" for the standard library or "lxml".
+    """
+
+    def __init__(self, name: str = "etree") -> None:
+        if name not in XML_BACKENDS:
+            raise ValueError(f"Unknown XML backend {name}, expected one of {XML_BACKENDS}")
+        self.name = name
+        self._xpaths: Dict[str, Any] = {}
+
+        if name == "lxml":
+            from lxml import etree
+
+            self.etree = etree
+            self._parser_options = dict(
+                load_dtd=False,
+                no_network=True,
+                huge_tree=False,
+                remove_comments=True,
+                remove_pis=True,
+            )
+            self._parser = etree.XMLParser(**self._parser_options)
+        else:
+            self.etree = ET
+            self._parser_options = {}
+            self._parser = None
+
+        self.Element = self.etree.Element
+        self.ElementTree = self.etree.ElementTree
+        self.ParseError = self.etree.ParseError
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self.name}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["name"])
+
+    def fromstring(self, data: bytes) -> Any:
+        """Parse a document and get its root element."""
+        if self._parser is None:
+            return ET.fromstring(data)
+        return self.etree.fromstring(data, self._parser)
+
+    def iterparse(
+        self, source: IO[bytes], events: Tuple[str, ...] = ("end",)
+    ) -> Iterator[Tuple[str, Any]]:
+        """Incrementally parse a document, see ``xml.etree.ElementTree.iterparse``."""
+        return self.etree.iterparse(source, events=events, **self._parser_options)
+
+    def findall(self, elem: Any, path: str) -> List[Any]:
+        """Get the elements matching a path that is valid for both ElementPath and XPath.
+
+        Parameters
+        ----------
+        elem : Element
+            Element the path is relative to.
+        path : str
+            A relative path such as ``measure`` or ``.//part``.
+
+        Returns
+        -------
+        List[Element]
+            Matching elements in document order.
+        """
+        if self._parser is None:
+            return elem.findall(path)
+        xpath = self._xpaths.get(path)
+        if xpath is None:
+            xpath = self._xpaths[path] = self.etree.XPath(path)
+        return xpath(elem)
@@ -1,8 +1,14 @@
 """Merge and validate works into a single, joint score."""
 
+import sys
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
 from typing import List
+
+# Make the shared dolores_common package importable when running from this folder
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from dolores_common import XML_BACKENDS
 from parse_musicxml import ParserMXML
 
 class Work:
@@ -21,7 +27,20 @@ class WorkCatalogue:
 
 
 def main(args: Namespace) -> None:
-    mxml_parser = ParserMXML(args.print_attributes, args.print_notes, args.time_equivalent, args.solve_error_1, args.solve_error_2)
+    mxml_parser = ParserMXML(
+        args.print_attributes,
+        args.print_notes,
+        args.time_equivalent,
+        args.solve_error_1,
+        args.solve_error_2,
+        cache_dir=args.cache_dir,
+        cache_size=args.cache_size * 1024**2,
+        offline=args.offline,
+        jobs=args.jobs,
+        stream=args.stream,
+        xml_backend=args.xml_backend,
+        snapshot=args.snapshot,
+    )
     mxml_parser.return_faulty()
 
 
@@ -33,6 +52,13 @@ def setup() -> Namespace:
     parser.add_argument('--time_equivalent', action='store_true', help='Do NOT count errors that consist of two equivalent time signatures')
     parser.add_argument('--solve_error_1', action='store_true', help='Sometimes attributes get duplicated, first one with print-object=no and the second one with print-object=yes. This removes the second attribute and changes the first one to print-object=yes')
     parser.add_argument('--solve_error_2', action='store_true', help='Some lines get saved with the wrong clef/key/time and print-object=no while the before and after lines are correct. This changes this middle line to the correct clef/key/time')
+    parser.add_argument('--cache_dir', type=Path, default=None, help='Directory for the persistent cache of backend responses')
+    parser.add_argument('--cache_size', type=int, default=2048, help='Size budget of the response cache in MB')
+    parser.add_argument('--offline', action='store_true', help='Run only from the response cache, without touching the backend')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of processes validating projects in parallel')
+    parser.add_argument('--stream', action='store_true', help='Validate each line while it is being parsed instead of building its whole tree first')
+    parser.add_argument('--xml_backend', choices=XML_BACKENDS, default='etree', help='Library used to parse and write MusicXML')
+    parser.add_argument('--snapshot', type=Path, default=None, help='Read the projects from a local snapshot directory instead of the backend')
     return parser.parse_args()
 
 
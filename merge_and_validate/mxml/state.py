@@ -1,6 +1,6 @@
 """Classes for operating on MusicXML."""
 
-from typing import List, Tuple
+from typing import Dict, List, Tuple, Union
 from xml.etree import ElementTree as ET
 from fractions import Fraction
 from sortedcontainers import SortedDict
@@ -97,6 +97,66 @@ class Attributes:
         )
 
 
+class AttributeIndex:
+    """Every attributes node of a line, parsed once and grouped by part.
+
+    Entries are snapshots taken when the node is visited, so they are not affected
+    by the merges the score state performs afterwards on the same objects.
+    """
+
+    def __init__(self) -> None:
+        self.parts: Dict[int, List[Attributes]] = {}
+
+    def add(self, part_id: int, attributes: Attributes) -> None:
+        """Record the parsed contents of an attributes node.
+
+        Parameters
+        ----------
+        part_id : int
+            Index of the part the node belongs to.
+        attributes : Attributes
+            The parsed node. Its xml_object must be the attributes element.
+        """
+        self.parts.setdefault(part_id, []).append(
+            Attributes(
+                attributes.xml_object,
+                list(attributes.clef),
+                list(attributes.timesig),
+                list(attributes.key),
+            )
+        )
+
+    def nodes(self, part_id: int) -> List[Attributes]:
+        """Get the attributes nodes of a part in document order."""
+        return self.parts.get(part_id, [])
+
+    def symbols(
+        self, part_id: int, ordinal: int, kind: str, staff: int
+    ) -> List[Union[Clef, Key, TimeSig]]:
+        """Get the clefs, keys or time signatures of one staff in an attributes node.
+
+        Parameters
+        ----------
+        part_id : int
+            Index of the part.
+        ordinal : int
+            Position of the attributes node within the part.
+        kind : str
+            One of "clef", "key" or "timesig".
+        staff : int
+            Staff number as parsed from the element.
+
+        Returns
+        -------
+        List[Union[Clef, Key, TimeSig]]
+            Matching symbols in document order. Empty if the node does not exist.
+        """
+        nodes = self.nodes(part_id)
+        if ordinal >= len(nodes):
+            return []
+        return [sym for sym in getattr(nodes[ordinal], kind) if sym.staff == staff]
+
+
 class ScoreState:
     def __init__(self, print_notes) -> None:
         self.nstaves = 1
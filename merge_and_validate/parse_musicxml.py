@@ -1,9 +1,12 @@
+import io
 import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, cast
 from xml.etree import ElementTree as ET
+from copy import deepcopy
 import json
-import requests
 
 #from mxml import symbol_table as ST
 from mxml import state as MST
@@ -12,7 +15,12 @@ from mxml.symbols import Clef, TimeSig, Key, Errors
 from mxml import types as TT
 MeasureID = Tuple[str, str]
 
-from config import username, password, backend_url
+try:
+    from config import username, password, backend_url
+except ImportError:
+    # Only needed when reading from the backend instead of a snapshot
+    username = password = backend_url = None
+from dolores_common import DEFAULT_CACHE_SIZE, ResponseCache, XmlBackend, open_data_source
 import shutil
 
 
@@ -20,21 +28,49 @@ class UnsupportedElement(ValueError):
     """Exception to throw with (currently) unsupported elements."""
 
 
+# Parser of the current worker process when validating projects in parallel
+_WORKER_PARSER: Optional["ParserMXML"] = None
+
+
+def _init_worker(parser: "ParserMXML") -> None:
+    global _WORKER_PARSER
+    _WORKER_PARSER = parser
+
+
+def _validate_project(project: Tuple[int, str]) -> Dict[int, Dict[int, List[str]]]:
+    return _WORKER_PARSER.validate_project(*project)
+
+
 class ParserMXML():
     """Navigates a MXML file"""
 
     _ALL_STAVES = -1
 
-    def __init__(self, print_attributes, print_notes, time_equivalent, error_1, error_2) -> None:
+    def __init__(
+        self,
+        print_attributes,
+        print_notes,
+        time_equivalent,
+        error_1,
+        error_2,
+        cache_dir: Optional[Path] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        offline: bool = False,
+        jobs: int = 1,
+        stream: bool = False,
+        xml_backend: str = "etree",
+        snapshot: Optional[Path] = None,
+    ) -> None:
         
-        # Backend info
-        self.backend_base_url = backend_url
-        self.username = username
-        self.password = password
+        # Backend info, or a local snapshot of it
+        cache = ResponseCache(cache_dir, cache_size) if cache_dir is not None and snapshot is None else None
+        self.client = open_data_source(
+            snapshot, backend_url, username, password, cache=cache, offline=offline
+        )
 
         #Backend pre-ops
-        self._authenticate()
-        self.projects_dict = self._fetch_projects()
+        self.client.authenticate()
+        self.projects_dict = self.client.fetch_projects()
 
         self.states: Dict[List[MST.ScoreState]] = {}
         #self.symbol_table = ST.SymbolTable()
@@ -43,12 +79,22 @@ class ParserMXML():
         self.time_equivalent = time_equivalent
         self.error_1 = error_1
         self.error_2 = error_2
+        self.jobs = jobs
+        self.stream = stream
+        self.xml = XmlBackend(xml_backend)
         self.error_dict = {}
         self.fixed_dir_1 = "./fixed_mxmls_1"
         self.fixed_dir_2 = "./fixed_mxmls_2"
         self.error_1_ids = []
         self.error_2_ids = []
 
+        # Attributes nodes of the line being parsed, used by the error 1 repair
+        self.attribute_index = MST.AttributeIndex()
+
+        # Parsed lines of the current project that had errors, kept for the repair
+        # passes so they do not have to download and parse them again
+        self.line_roots: Dict[int, ET.Element] = {}
+
         if self.error_1:
             if os.path.exists(self.fixed_dir_1):
                 shutil.rmtree(self.fixed_dir_1)
@@ -78,81 +124,13 @@ class ParserMXML():
         #self.group_stack: GroupStack = GroupStack(self.states, self.symbol_table)
         #self.last_measure: Optional[MTN.AST.Measure] = None
 
-    def _authenticate(self):
-
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/token"
-        data = {
-            'grant_type': 'password',
-            'username': self.username,
-            'password': self.password,
-            'scope': '',
-            'client_id': '',
-            'client_secret': '',
-        }
-        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-        try:
-            response = requests.post(url, data=data, headers=headers)
-            response.raise_for_status()
-            token_data = response.json()
-            GLOBAL_ACCESS_TOKEN = token_data.get('access_token')
-            if not GLOBAL_ACCESS_TOKEN:
-                raise Exception("No access_token in response")
-        except Exception as e:
-            print(f"Error authenticating with backend: {e}")
-            GLOBAL_ACCESS_TOKEN = None
-
-    def _fetch_projects(self):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/projects"
-        headers = {}
-        if GLOBAL_ACCESS_TOKEN:
-            headers['Authorization'] = f"Bearer {GLOBAL_ACCESS_TOKEN}"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            projects = response.json()
-            return {proj["project_id"]: proj["project_name"] for proj in projects}
-        except Exception as e:
-            print(f"Error fetching projects from backend: {e}")
-            return {}
-
-
-    def _fetch_lines(self, project_id):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/lines/{project_id}"
-        headers = {}
-        if GLOBAL_ACCESS_TOKEN:
-            headers['Authorization'] = f"Bearer {GLOBAL_ACCESS_TOKEN}"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error fetching lines for project {project_id}: {e}")
-            return None
-
-
-    def _fetch_musicxml(self, project_id, line_id):
-        global GLOBAL_ACCESS_TOKEN
-        url = f"{self.backend_base_url}/transcription/musicxml/{project_id}/{line_id}"
-        headers = {}
-        if GLOBAL_ACCESS_TOKEN:
-            headers['Authorization'] = f"Bearer {GLOBAL_ACCESS_TOKEN}"
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            return response.content
-        except Exception as e:
-            print(f"Error fetching musicxml for project {project_id}, line {line_id}: {e}")
-            return None
-
     def return_faulty(
         self,
     ) -> None:
         """
         Primera passada que comprovi quins scores son erronis comparant els clefs a diferents linies
         """
+        projects = []
         for project_id, project_name in self.projects_dict.items():
             #if "XAC_ACAN_SMIAu09_195" not in project_name:
             #    continue
@@ -160,21 +138,90 @@ class ParserMXML():
                 continue
             if str(project_id) in self.error_2_ids:
                 continue
-            lines_info = self._fetch_lines(project_id)
-            if not lines_info or "line_ids" not in lines_info:
+            projects.append((project_id, project_name))
+
+        # Cada projecte es valida de forma independent i els errors s'ajunten al final
+        faulty = {}
+        if self.jobs > 1:
+            with ProcessPoolExecutor(
+                self.jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self,),
+            ) as pool:
+                results = pool.map(_validate_project, projects)
+                for (_, project_name), errors in zip(projects, results):
+                    self.merge_errors(faulty, project_name, errors)
+        else:
+            for project_id, project_name in projects:
+                errors = self.validate_project(project_id, project_name)
+                self.merge_errors(faulty, project_name, errors)
+        self.error_dict = faulty
+
+        with open("faulty_files.json", "w") as json_file:
+            json.dump(self.error_dict, json_file, indent=4)
+        print("Operació completada! S'han guardat els errors a faulty_files.json")
+        # Amb --jobs les peticions es fan als processos fills
+        if self.jobs == 1:
+            for line in self.client.stats_report():
+                print(line)
+
+
+    def validate_project(self, project_id: int, project_name: str) -> Dict[int, Dict[int, List[str]]]:
+        """Validate, and repair if enabled, every line of a single project.
+
+        The state of the parser is reset before starting, so the result does not
+        depend on the projects validated before and can be computed in any process.
+
+        Parameters
+        ----------
+        project_id : int
+            Backend id of the project.
+        project_name : str
+            Name of the project, used as key of the error dictionary.
+
+        Returns
+        -------
+        Dict[int, Dict[int, List[str]]]
+            Errors found in the project by line and part, empty if there are none.
+        """
+        self.states = {}
+        self.line_roots = {}
+        self.error_dict = {}
+
+        lines_info = self.client.fetch_lines(project_id)
+        if not lines_info or "line_ids" not in lines_info:
+            return {}
+        # Totes les linies del projecte en una sola peticio si el backend ho permet
+        bulk = self.client.fetch_bulk(project_id, lines_info["line_ids"], with_alignment=False)
+        last_num_parts = None
+        for line_id in lines_info["line_ids"]:
+            print(f"Processing: {project_name} (ID: {project_id}) line {line_id}")
+            musicxml_bytes = bulk[0].get(line_id) if bulk is not None else None
+            # Lines left out of the bulk response are requested on their own
+            if musicxml_bytes is None:
+                musicxml_bytes = self.client.fetch_musicxml(project_id, line_id)
+            if not musicxml_bytes:
                 continue
-            last_num_parts = None
-            for line_id in lines_info["line_ids"]:
-                print(f"Processing: {project_name} (ID: {project_id}) line {line_id}")
-                musicxml_bytes = self._fetch_musicxml(project_id, line_id)
-                if not musicxml_bytes:
+
+            if self.stream:
+                try:
+                    root, num_parts = self.stream_for_attributes(musicxml_bytes, last_num_parts)
+                except self.xml.ParseError as e:
+                    print(f"Error parsing MusicXML for project {project_id}, line {line_id}: {e}")
                     continue
+                # Skip the few projects that change number of parts between lines
+                if root is None:
+                    break
+                if num_parts is not None:
+                    last_num_parts = num_parts
+            else:
                 try:
-                    tree = ET.ElementTree(ET.fromstring(musicxml_bytes))
+                    tree = self.xml.ElementTree(self.xml.fromstring(musicxml_bytes))
                 except Exception as e:
                     print(f"Error parsing MusicXML for project {project_id}, line {line_id}: {e}")
                     continue
-                
+
                 # Skip the few projects that change number of parts between lines
                 root = tree.getroot()
                 part_list = root.find("part-list")
@@ -185,32 +232,45 @@ class ParserMXML():
                         if num_parts != last_num_parts:
                             break
                     last_num_parts = num_parts
-                        
+
                 self.parse_for_attributes(root)
-                if(self.print_attributes):
-                    print("INITIAL!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-                    for part in self.states.keys():
-                        print("PART ", part+1)
-                        print(self.states[part][-1].initial_attributes)
-                    print("CURRENT!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-                    for part in self.states.keys():
-                        print("PART ", part+1)
-                        print(self.states[part][-1].current_attributes)
+            if(self.print_attributes):
+                print("INITIAL!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+                for part in self.states.keys():
+                    print("PART ", part+1)
+                    print(self.states[part][-1].initial_attributes)
+                print("CURRENT!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+                for part in self.states.keys():
+                    print("PART ", part+1)
+                    print(self.states[part][-1].current_attributes)
 
-                if line_id != 1:
-                    self.check_attributes(project_name, line_id)
+            if line_id != 1:
+                self.check_attributes(project_name, line_id)
 
-                if self.error_1:
-                    self.check_error_1(project_name, project_id, line_id)
+            if line_id in self.error_dict.get(project_name, {}):
+                self.retain_line(line_id, root)
 
-            if self.error_2:
-                    self.check_error_2(project_name, project_id)    
+            if self.error_1:
+                self.check_error_1(project_name, project_id, line_id, root)
 
-            self.states = {}
+        if self.error_2:
+            self.check_error_2(project_name, project_id)
+
+        self.states = {}
+        self.line_roots = {}
+        return self.error_dict.get(project_name, {})
 
-        with open("faulty_files.json", "w") as json_file:
-            json.dump(self.error_dict, json_file, indent=4)
-        print("Operació completada! S'han guardat els errors a faulty_files.json")
+
+    @staticmethod
+    def merge_errors(error_dict: Dict, project_name: str, errors: Dict[int, Dict[int, List[str]]]) -> None:
+        """Add the errors of a project to the dictionary written to faulty_files.json."""
+        if not errors:
+            return
+        project_errors = error_dict.setdefault(project_name, {})
+        for line_id, parts in errors.items():
+            line_errors = project_errors.setdefault(line_id, {})
+            for part, part_errors in parts.items():
+                line_errors.setdefault(part, []).extend(part_errors)
 
 
     def check_attributes(self, score: str, line_id: int) -> None:
@@ -254,6 +314,7 @@ class ParserMXML():
         Funció que actualitzi el score states de la linea amb els atributs inicials i els finals, perque es puguin comparar i veure
           si es canvia de clef amb print_object = Fals (Cas erroni) a la seguent linia
         '''
+        self.attribute_index = MST.AttributeIndex()
         part_id = 0
         for child in root:
             if child.tag == "part":
@@ -267,159 +328,134 @@ class ParserMXML():
                 part_id += 1
 
 
-    def check_error_1(self, project_name: str, project_id: int, line_id: int) -> bool:
+    def stream_for_attributes(self, musicxml_bytes: bytes, last_num_parts: Optional[int]) -> Tuple[Optional[ET.Element], Optional[int]]:
+        """Same as parse_for_attributes, but visiting each measure as soon as it is read.
+
+        Unless a repair is enabled, which needs the whole tree, measures are dropped
+        once visited, so memory does not grow with the length of the line.
+
+        Parameters
+        ----------
+        musicxml_bytes : bytes
+            The MusicXML of the line.
+        last_num_parts : Optional[int]
+            Number of parts of the previous line, if known.
+
+        Returns
+        -------
+        Tuple[Optional[ET.Element], Optional[int]]
+            The root of the line and its number of parts according to the part-list.
+            The root is None, and nothing is parsed, if the number of parts differs
+            from last_num_parts.
+        """
+        self.attribute_index = MST.AttributeIndex()
+        keep_tree = self.error_1 or self.error_2
+        num_parts = None
+        new_parts = []
+        part_id = -1
+        part_element = None
+        root = None
+        depth = 0
+
+        try:
+            for event, elem in self.xml.iterparse(io.BytesIO(musicxml_bytes), events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 1:
+                        root = elem
+                    elif depth == 2 and elem.tag == "part":
+                        part_id += 1
+                        part_element = elem
+                        # Add state to that part state list
+                        if part_id in self.states and isinstance(self.states[part_id], list):
+                            self.states[part_id].append(MST.ScoreState(self.print_notes))
+                        else:
+                            self.states[part_id] = [MST.ScoreState(self.print_notes)]
+                        new_parts.append(part_id)
+                    continue
+
+                depth -= 1
+                if depth == 1 and elem.tag == "part-list":
+                    num_parts = len(elem.findall("score-part"))
+                    if last_num_parts is not None and num_parts != last_num_parts:
+                        return None, num_parts
+                elif depth == 2 and part_element is not None:
+                    self._visit_measure(elem, part_id)
+                    if not keep_tree:
+                        part_element.remove(elem)
+                elif depth == 1:
+                    part_element = None
+        except self.xml.ParseError:
+            # Leave the states as they were before this line
+            for part_id in new_parts:
+                self.states[part_id].pop()
+                if not self.states[part_id]:
+                    del self.states[part_id]
+            raise
+
+        return root, num_parts
+
+
+    def retain_line(self, line_id: int, root: ET.Element) -> None:
+        """Keep the parsed tree of a faulty line for the error 1 and error 2 repairs.
+
+        Error 1 is repaired in place on the tree used during parsing. Error 2 is
+        repaired at the end of the project and must start from the line as it was
+        downloaded, so it gets its own copy when both repairs are enabled.
+        """
+        if not self.error_2:
+            return
+        self.line_roots[line_id] = deepcopy(root) if self.error_1 else root
+
+    def check_error_1(self, project_name: str, project_id: int, line_id: int, root: ET.Element) -> bool:
         if project_name not in self.error_dict:
             return False
         if line_id not in self.error_dict[project_name].keys():
             return False
         
-        # AIXO POTSER PUC FER QUE JA HO FAGI AL PARSING INICIAL
-        # AIXI NO HAIG DE REPETIR PARSING I QUE TARDI TANT
-        
-        musicxml_bytes = self._fetch_musicxml(project_id, line_id)
-        root = ET.ElementTree(ET.fromstring(musicxml_bytes)).getroot()
-        error_parts = self.error_dict[project_name][line_id].keys()
-        for part_id in error_parts:
-
-            part = 1
-            for sub_root in root:
-                if sub_root.tag == "part":
-                    if part_id == part:
-                        attributes_dict = {}
-                        attribute_id = 0
-                        for measure in sub_root:
-                            for sub_measure in measure:
-                                if sub_measure.tag == "attributes":
-                                    output_attributes = MST.Attributes(sub_measure)
-
-                                    for sub_attributes in sub_measure:
-                                        if sub_attributes.tag == "key":
-                                            key = self._visit_key(sub_attributes, part_id-1)
-                                            output_attributes.key.append(key)
-                                        elif sub_attributes.tag == "time":
-                                            timesig = self._visit_time(sub_attributes)
-                                            output_attributes.timesig.append(timesig)
-                                        elif sub_attributes.tag == "clef":
-                                            clef = self._visit_clef(sub_attributes)
-                                            output_attributes.clef.append(clef)
-                                    
-                                    attributes_dict[attribute_id] = output_attributes
-                                    attribute_id += 1
-
-                        # FER QUE FUNCIONI AMB MULTIPLES STAVES !!!kjhdihiwpheghjsepg
-
-                        if Errors.ClefChangeNoPrintError.value in self.error_dict[project_name][line_id][part_id]:
-                            #Passar a funcio especifica (li passo clef o timesig o key per parametre aixi puc reutilitzar)
-                            first_clefs = None
-                            for actual_attribute_id, attributes in attributes_dict.items():
-                                if first_clefs == None:
-                                    first_clefs = attributes.clef
-                                    first_attribute_id = actual_attribute_id
-                                else:
-                                    if attributes.clef is not None:
-                                        for first_clef in first_clefs:
-                                            if first_clef.compare_for_error1(attributes.clef): 
-                                                self.solve_error_1(project_name, project_id, line_id, root, "clef", attributes_dict, first_attribute_id, actual_attribute_id, part_id, first_clef.staff)
-                                        break    
-                        if Errors.KeyChangeNoPrintError.value in self.error_dict[project_name][line_id][part_id]:
-                            #Passar a funcio especifica (li passo clef o timesig o key per parametre aixi puc reutilitzar)
-                            first_keys = None
-                            for actual_attribute_id, attributes in attributes_dict.items():
-                                if first_keys == None:
-                                    first_keys = attributes.key
-                                    first_attribute_id = actual_attribute_id
-                                else:
-                                    if attributes.key is not None:
-                                        for first_key in first_keys:
-                                            if first_key.compare_for_error1(attributes.key): 
-                                                self.solve_error_1(project_name, project_id, line_id, root, "key", attributes_dict, first_attribute_id, actual_attribute_id, part_id, first_key.staff)
-                                        break     
-                        if Errors.TimesigChangeNoPrintError.value in self.error_dict[project_name][line_id][part_id]:
-                            #Passar a funcio especifica (li passo clef o timesig o key per parametre aixi puc reutilitzar)
-                            first_times = None
-                            for actual_attribute_id, attributes in attributes_dict.items():
-                                if first_times == None:
-                                    first_times = attributes.timesig
-                                    first_attribute_id = actual_attribute_id
-                                else:
-                                    if attributes.timesig is not None:
-                                        for first_time in first_times:
-                                            if first_time.compare_for_error1(attributes.timesig): 
-                                                self.solve_error_1(project_name, project_id, line_id, root, "timesig", attributes_dict, first_attribute_id, actual_attribute_id, part_id, first_time.staff)
-                                        break                              
-                    part += 1
-                
-                    
-    def solve_error_1(self, project_name: str, project_id: int, line_id: int, root: ET.ElementTree, element: str, attributes_dict, first_attribute_id: int, second_attribute_id: int, part_id: int, staff: int) -> None:
+        # Nomes es comparen els dos primers attributes de cada part, ja indexats al parsing
+        checks = (
+            ("clef", Errors.ClefChangeNoPrintError),
+            ("key", Errors.KeyChangeNoPrintError),
+            ("timesig", Errors.TimesigChangeNoPrintError),
+        )
+        for part_id, part_errors in self.error_dict[project_name][line_id].items():
+            attributes_nodes = self.attribute_index.nodes(part_id-1)
+            if len(attributes_nodes) < 2:
+                continue
+
+            # FER QUE FUNCIONI AMB MULTIPLES STAVES !!!kjhdihiwpheghjsepg
+
+            for element, error in checks:
+                if error.value not in part_errors:
+                    continue
+                second_elements = getattr(attributes_nodes[1], element)
+                for first_element in getattr(attributes_nodes[0], element):
+                    if first_element.compare_for_error1(second_elements):
+                        self.solve_error_1(project_name, project_id, line_id, root, element, 0, 1, part_id, first_element.staff)
+
+
+    def solve_error_1(self, project_name: str, project_id: int, line_id: int, root: ET.ElementTree, element: str, first_attribute_id: int, second_attribute_id: int, part_id: int, staff: int) -> None:
         """
         first_attribute_id -> Primer attribute on surt l'element indicat a la variable element (clef, key o timesig)
         actual_attribute_id -> Segon attribute on surt l'element indicat a la variable element (clef, key o timesig)
         """
-        part = 1
-        for sub_root in root:
-            if sub_root.tag == "part":
-                if part_id == part:
-                    attributes_dict = {}
-                    attribute_id = 0
-                    for measure in sub_root:
-                        for sub_measure in measure:
-                            if sub_measure.tag == "attributes":
-                                if first_attribute_id == attribute_id:
-                                    # LI HEM DE POSAR print_object = yes
-                                    if element == "clef":
-                                        for clef in sub_measure.findall("clef"):
-                                            staff_element = int(clef.get("number", "1"))
-                                            if staff_element == staff:        
-                                                if clef.get("print-object", "yes") == "no":
-                                                    clef.set("print-object", "yes")
-                                                    break
-                                    elif element == "key":
-                                        for key in sub_measure.findall("key"):
-                                            staff_element = int(key.get("number", "-1"))
-                                            if staff_element == staff:        
-                                                if key.get("print-object", "yes") == "no":
-                                                    key.set("print-object", "yes")
-                                                    break
-                                    elif element == "timesig":
-                                        for time in sub_measure.findall("time"):
-                                            staff_element = int(time.get("number", "-1"))
-                                            if staff_element == staff:        
-                                                if time.get("print-object", "yes") == "no":
-                                                    time.set("print-object", "yes")
-                                                    break
-
-                                elif second_attribute_id == attribute_id:
-                                    # HEM DE POSAR print_object = no
-                                    if element == "clef":
-                                        for clef in sub_measure.findall("clef"):
-                                            staff_element = int(clef.get("number", "1"))
-                                            if staff_element == staff:   
-                                                if clef.get("print-object", "yes") == "yes":
-                                                    clef.set("print-object", "no")
-                                                    break
-                                    elif element == "key":
-                                        for key in sub_measure.findall("key"):
-                                            staff_element = int(key.get("number", "-1"))
-                                            if staff_element == staff:   
-                                                if key.get("print-object", "yes") == "yes":
-                                                    key.set("print-object", "no")
-                                                    break
-                                    elif element == "timesig":
-                                        for time in sub_measure.findall("time"):
-                                            staff_element = int(time.get("number", "-1"))
-                                            if staff_element == staff:   
-                                                if time.get("print-object", "yes") == "yes":
-                                                    time.set("print-object", "no")
-                                                    break
-                                attribute_id += 1
-                part += 1
-        
-
+        # LI HEM DE POSAR print_object = yes
+        for symbol in self.attribute_index.symbols(part_id-1, first_attribute_id, element, staff):
+            if symbol.xml_object.get("print-object", "yes") == "no":
+                symbol.xml_object.set("print-object", "yes")
+                break
+
+        # HEM DE POSAR print_object = no
+        for symbol in self.attribute_index.symbols(part_id-1, second_attribute_id, element, staff):
+            if symbol.xml_object.get("print-object", "yes") == "yes":
+                symbol.xml_object.set("print-object", "no")
+                break
 
         # QUAN FAGI SEGON CLEF/KEY/TIMESIG FER BREAK TOTAL FINS AQUI
 
         fixed_path = os.path.join(self.fixed_dir_1, f"{project_id}_{line_id}.musicxml")
-        tree = ET.ElementTree(root)
+        tree = self.xml.ElementTree(root)
         tree.write(fixed_path, encoding="utf-8", xml_declaration=True)
     
 
@@ -497,8 +533,9 @@ class ParserMXML():
         actual_attribute_id -> Segon attribute on surt l'element indicat a la variable element (clef, key o timesig)
         """
         # POSAR CLEF DE LA LINIA ANTERIOR A TOTS ELS ATRIBUTS DE LA LINIA ACTUAL
-        musicxml_bytes = self._fetch_musicxml(project_id, line_id)
-        root = ET.ElementTree(ET.fromstring(musicxml_bytes)).getroot()
+        root = self.line_roots.get(line_id)
+        if root is None:
+            return None
 
         part = 1
         for sub_root in root:
@@ -532,11 +569,11 @@ class ParserMXML():
                                                 key.remove(keyvalue)
 
                                             for i in range(len(last_object.alter_steps)):
-                                                key_step = ET.Element("key-step")
+                                                key_step = self.xml.Element("key-step")
                                                 key_step.text = last_object.alter_steps[i].name
                                                 key.append(key_step)
 
-                                                key_value = ET.Element("key-alter")
+                                                key_value = self.xml.Element("key-alter")
                                                 key_value.text = str(last_object.alter_value[i])
                                                 key.append(key_value)
                                 elif element == "timesig":
@@ -558,7 +595,7 @@ class ParserMXML():
 
 
         fixed_path = os.path.join(self.fixed_dir_2, f"{project_id}_{line_id}.musicxml")
-        tree = ET.ElementTree(root)
+        tree = self.xml.ElementTree(root)
         tree.write(fixed_path, encoding="utf-8", xml_declaration=True)
 
 
@@ -710,6 +747,8 @@ class ParserMXML():
             if self.states[part_id][-1].initial_attributes.xml_object == None:
                 self.states[part_id][-1].initial_attributes = output_attributes
 
+            self.attribute_index.add(part_id, output_attributes)
+
 
     def _visit_clef(
         self,
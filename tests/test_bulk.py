@@ -0,0 +1,76 @@
+import json
+import sys
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from dolores_common.client import BackendClient  # noqa: E402
+from dolores_common.prefetch import ProjectPrefetcher  # noqa: E402
+from dolores_common.standin_server import SnapshotHandler  # noqa: E402
+
+LINE_IDS = [1, 2, 3, 4]
+
+
+class BrokenBulkHandler(SnapshotHandler):
+    """Corrupt the record of line 2 and leave out line 3 in bulk responses."""
+
+    def _send(self, body, content_type="application/json", code=200):
+        if content_type == "application/x-ndjson":
+            records = body.decode().split("\n")
+            records[1] = records[1][: len(records[1]) // 2]
+            del records[2]
+            body = "\n".join(records).encode()
+        super()._send(body, content_type, code)
+
+
+@pytest.fixture
+def backend_url(tmp_path):
+    project = tmp_path / "7"
+    project.mkdir()
+    (tmp_path / "projects.json").write_text(
+        json.dumps([{"project_id": 7, "project_name": "test"}])
+    )
+    (project / "lines.json").write_text(json.dumps({"line_ids": LINE_IDS}))
+    for line_id in LINE_IDS:
+        (project / f"{line_id}.musicxml").write_text(f"<line id='{line_id}'/>")
+        (project / f"{line_id}.alignment.json").write_text(json.dumps([line_id]))
+
+    handler = partial(BrokenBulkHandler, snapshot=tmp_path, bulk=True)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(backend_url):
+    client = BackendClient(backend_url, "user", "password", max_retries=0)
+    client.authenticate()
+    return client
+
+
+def test_bulk_skips_malformed_and_missing_records(backend_url):
+    client = make_client(backend_url)
+    client.fetch_lines(7)
+
+    musicxml, alignment = client.fetch_bulk(7, LINE_IDS, with_alignment=True)
+
+    assert musicxml == {1: b"<line id='1'/>", 2: None, 3: None, 4: b"<line id='4'/>"}
+    assert alignment == {1: [1], 2: None, 3: None, 4: [4]}
+
+
+def test_prefetch_requests_lines_left_out_of_bulk(backend_url):
+    prefetcher = ProjectPrefetcher(make_client(backend_url), max_workers=2)
+
+    (data,) = prefetcher.iter_projects({7: "test"})
+
+    assert data.musicxml == {
+        line_id: f"<line id='{line_id}'/>".encode() for line_id in LINE_IDS
+    }
+    assert data.alignment == {line_id: [line_id] for line_id in LINE_IDS}
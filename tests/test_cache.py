@@ -0,0 +1,38 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from dolores_common.cache import ResponseCache  # noqa: E402
+
+
+def test_concurrent_puts_of_the_same_body(tmp_path):
+    cache = ResponseCache(tmp_path)
+    body = b"<score-partwise/>" * 1000
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(lambda ii: cache.put(f"key{ii}", body), range(64)))
+
+    assert all(cache.get(f"key{ii}") == body for ii in range(64))
+    assert not list(cache.objects_path.rglob("*.tmp"))
+
+
+def test_put_restores_a_missing_object(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("first", b"body")
+    next(x for x in cache.objects_path.rglob("*") if x.is_file()).unlink()
+
+    cache.put("second", b"body")
+
+    assert cache.get("second") == b"body"
+
+
+def test_objects_dropped_with_their_last_key(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=10)
+    cache.put("first", b"12345678")
+    cache.put("second", b"abcdefgh")
+
+    assert cache.get("first") is None
+    assert cache.get("second") == b"abcdefgh"
+    assert len([x for x in cache.objects_path.rglob("*") if x.is_file()]) == 1
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def imported_modules(statement):
+    code = f"import sys\n{statement}\nprint(' '.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+def test_geometry_does_not_import_the_client():
+    modules = imported_modules("from dolores_common import geometry, svg_index")
+
+    assert "dolores_common.client" not in modules
+    assert "requests" not in modules
+
+
+def test_public_names_are_importable():
+    modules = imported_modules(
+        "from dolores_common import *\n"
+        "from dolores_common import XML_BACKENDS, open_data_source"
+    )
+
+    assert "dolores_common.client" in modules
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+import pytest
+from lxml import etree
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "validation_tools"))
+
+from svg_processor import NAMESPACES, SVGProcessor  # noqa: E402
+
+SVG = NAMESPACES["svg"]
+
+
+def make_beam(polygons):
+    root = etree.Element(f"{{{SVG}}}svg", nsmap={None: SVG})
+    beam = etree.SubElement(root, f"{{{SVG}}}g", {"class": "beam", "id": "beam5"})
+    for points in polygons:
+        etree.SubElement(beam, f"{{{SVG}}}polygon", {"points": points})
+    return root, beam
+
+
+def beam_points(beam):
+    return {x.get("id"): x.get("points") for x in beam if x.get("class") == "beam"}
+
+
+def test_stems_down_primary_beam_keeps_first_id():
+    # With stems down Verovio draws the primary beam first, below the secondary one
+    primary = "0,100 300,100 300,110 0,110"
+    secondary = "0,80 100,80 100,90 0,90"
+    root, beam = make_beam([primary, secondary])
+
+    SVGProcessor().process_tree(root)
+
+    assert beam_points(beam) == {"beam5": primary, "beam6": secondary}
+
+
+def test_fragments_merged_regardless_of_document_order():
+    primary = "0,0 300,0 300,10 0,10"
+    root, beam = make_beam(
+        [
+            primary,
+            "100,20 200,20 200,30 100,30",
+            "0,20 100,20 100,30 0,30",
+        ]
+    )
+
+    SVGProcessor().process_tree(root)
+
+    assert beam_points(beam) == {
+        "beam5": primary,
+        "beam6": "0,20 200,20 200,30 0,30",
+    }
+
+
+def test_beam_without_polygons_is_rejected():
+    root = etree.Element(f"{{{SVG}}}svg", nsmap={None: SVG})
+    beam = etree.SubElement(root, f"{{{SVG}}}g", {"class": "beam", "id": "beam1"})
+    etree.SubElement(beam, f"{{{SVG}}}g", {"class": "note"}).append(
+        etree.Element(f"{{{SVG}}}use")
+    )
+
+    with pytest.raises(ValueError):
+        SVGProcessor().process_tree(root)
+
+
+def make_chord(notehead_attrib):
+    root = etree.Element(f"{{{SVG}}}svg", nsmap={None: SVG})
+    chord = etree.SubElement(root, f"{{{SVG}}}g", {"class": "chord", "id": "chord1"})
+    note = etree.SubElement(chord, f"{{{SVG}}}g", {"class": "note", "id": "note1"})
+    notehead = etree.SubElement(note, f"{{{SVG}}}g", {"class": "notehead"})
+    etree.SubElement(notehead, f"{{{SVG}}}use", notehead_attrib)
+    dots = etree.SubElement(chord, f"{{{SVG}}}g", {"class": "dots"})
+    dot = etree.SubElement(dots, f"{{{SVG}}}ellipse", {"cx": "20", "cy": "10"})
+    return root, dot
+
+
+def test_chord_dots_assigned_to_their_note():
+    root, dot = make_chord({"x": "0", "y": "10"})
+
+    SVGProcessor().process_tree(root)
+
+    assert dot.get("id") == "note1.dot1"
+
+
+def test_notehead_without_position_is_rejected():
+    root, _ = make_chord({"x": "0"})
+
+    with pytest.raises(ValueError):
+        SVGProcessor().process_tree(root)
@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "validation_tools"))
+
+import validate_and_convert  # noqa: E402
+from validate_and_convert import ConversionPipeline  # noqa: E402
+
+# Stand-in for MuseScore that silently skips the inputs with "skip" in their name
+FAKE_MUSESCORE = """#!{python}
+import json, sys
+for row in json.load(open(sys.argv[2])):
+    if "skip" not in row["in"]:
+        open(row["out"], "w").write("<score-partwise/>")
+"""
+
+
+def test_stale_outputs_do_not_hide_skipped_files(tmp_path, monkeypatch):
+    musescore = tmp_path / "mscore"
+    musescore.write_text(FAKE_MUSESCORE.format(python=sys.executable))
+    musescore.chmod(0o755)
+    monkeypatch.setattr(validate_and_convert, "MUSESCORE_EXECUTABLE", str(musescore))
+
+    job = [
+        {"in": str(tmp_path / f"{name}.mscz"), "out": str(tmp_path / f"{name}.mxl")}
+        for name in ("convert", "skip")
+    ]
+    # Output of an earlier run of the file MuseScore now skips
+    Path(job[1]["out"]).write_text("<score-partwise/>")
+
+    converter = ConversionPipeline(overwrite=True, lax=True, output_path=None)
+    assert converter.run_musescore(job) == {job[1]["out"]}
+    assert Path(job[0]["out"]).exists()
+    assert not Path(job[1]["out"]).exists()
+
+
+def test_postprocess_reports_malformed_files(tmp_path):
+    mxml_file = tmp_path / "broken.musicxml"
+    mxml_file.write_text("<score-partwise>")
+
+    pipeline = ConversionPipeline(overwrite=True, lax=True, output_path=None)
+    error = pipeline.postprocess(mxml_file, tmp_path / "broken.svg")
+
+    assert error.startswith("XMLSyntaxError")
+
+
+def test_postprocess_does_not_hide_bugs(tmp_path, monkeypatch):
+    mxml_file = tmp_path / "score.musicxml"
+    mxml_file.write_text("<score-partwise/>")
+
+    pipeline = ConversionPipeline(overwrite=True, lax=True, output_path=None)
+
+    def process_tree(root):
+        raise TypeError("bug")
+
+    monkeypatch.setattr(pipeline.mxml_processor, "process_tree", process_tree)
+    with pytest.raises(TypeError):
+        pipeline.postprocess(mxml_file, tmp_path / "score.svg")
@@ -0,0 +1,100 @@
+"""Measure how long SVGProcessor spends finding the groups it identifies.
+
+Usage: ``python benchmark_svg.py SVG [SVG ...]``
+
+The SVGs must be raw Verovio output, before any processing. For every file the
+script times the whole-document queries the identification passes used to run one
+by one, the single walk that replaces them and the complete processing. Every run
+works on a freshly parsed tree, and parsing is not timed.
+"""
+
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Callable, List
+
+from lxml import etree
+from lxml.etree import _Element as Element
+
+# Make the shared dolores_common package importable when running from this folder
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from svg_processor import NAMESPACES, SVGProcessor
+
+# Queries issued by the identification passes before they shared a single walk
+PASS_QUERIES = [
+    ".//svg:g",
+    ".//svg:g[@class='beam']",
+    ".//svg:g[@class='barLine']",
+    ".//svg:g[@class='meterSig']",
+    ".//*[svg:g[@class='dots']]",
+    ".//svg:g[@class='note']",
+    ".//svg:g[@class='fTrem']",
+    ".//svg:g[@class='bTrem']",
+    ".//svg:g[@class='stem']",
+    ".//svg:g[@class='tuplet']",
+    ".//svg:g[@class='tuplet']",
+    ".//svg:g[@class='measure']",
+    ".//svg:g[@class='ending systemMilestone']",
+]
+
+
+def time_operation(
+    operation: Callable[[Element], object], svg_file: Path, repeat: int
+) -> float:
+    """Median wall time of ``repeat`` runs of ``operation``, in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        root = etree.parse(svg_file).getroot()
+        start = time.perf_counter()
+        operation(root)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run_queries(root: Element) -> None:
+    for query in PASS_QUERIES:
+        root.xpath(query, namespaces=NAMESPACES)
+
+
+def main(args: Namespace) -> None:
+    processor = SVGProcessor()
+    operations = {
+        "queries": run_queries,
+        "walk": processor._collect_svg_groups,
+        "process": processor.process_tree,
+    }
+
+    print(f"Median of {args.repeat} runs in ms")
+    print(f"{'file':<40}" + "".join(f"{name:>12}" for name in operations))
+    for svg_file in args.svg_files:
+        timings = [
+            time_operation(operation, svg_file, args.repeat)
+            for operation in operations.values()
+        ]
+        print(f"{svg_file.name:<40}" + "".join(f"{x:>12.1f}" for x in timings))
+
+
+def setup() -> Namespace:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "svg_files",
+        type=Path,
+        nargs="+",
+        help="Verovio SVG outputs to process.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Number of timed runs of every operation.",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    main(setup())
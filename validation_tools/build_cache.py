@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict
+
+
+def file_hash(path: Path) -> str:
+    """sha256 of the contents of a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f_in:
+        for chunk in iter(lambda: f_in.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Record of the MuseScore files that were converted and how.
+
+    Every converted file gets an entry keyed by its MusicXML output, holding the
+    hash of the ``.mscz`` it was converted from, the versions of the tools that
+    converted it and the SVG rendered from it. A file whose entry still matches
+    and whose outputs exist does not need to be converted again.
+
+    Parameters
+    ----------
+    path : Path
+        JSON file holding the entries. Created on the first ``save``.
+    tools : Dict[str, str]
+        Versions of the tools and options that affect the outputs. Entries made
+        with different tools never match.
+    """
+
+    def __init__(self, path: Path, tools: Dict[str, str]) -> None:
+        self.path = Path(path)
+        self.tools = tools
+        self.entries: Dict[str, Dict] = {}
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f_cache:
+                self.entries = json.load(f_cache)
+
+    def is_current(self, mxml_file: Path, svg_file: Path, mscz_hash: str) -> bool:
+        entry = self.entries.get(str(mxml_file))
+        return (
+            entry is not None
+            and entry["mscz"] == mscz_hash
+            and entry["tools"] == self.tools
+            and entry["svg"] == str(svg_file)
+            and mxml_file.exists()
+            and svg_file.exists()
+        )
+
+    def record(self, mxml_file: Path, svg_file: Path, mscz_hash: str) -> None:
+        self.entries[str(mxml_file)] = {
+            "mscz": mscz_hash,
+            "tools": self.tools,
+            "svg": str(svg_file),
+        }
+
+    def save(self) -> None:
+        # Replace the file at once so an interrupted run never leaves it truncated
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f_cache:
+            json.dump(self.entries, f_cache, indent=4)
+        os.replace(tmp_path, self.path)
@@ -11,8 +11,11 @@ _LOGGER = logging.getLogger(__name__)
 class MXMLProcessor:
     def process(self, mxml_file: Path) -> None:
         tree = etree.parse(mxml_file)
-        root = tree.getroot()
+        self.process_tree(tree.getroot())
+        tree.write(mxml_file)
 
+    def process_tree(self, root: Element) -> None:
+        """Add identifiers to the elements of a parsed MusicXML score in place."""
         # fmt: off
 
         # Objects that are present in only one place
@@ -54,8 +57,6 @@ class MXMLProcessor:
         # Set measure identifiers from the measure numbers
         self._identify_measures(root)
 
-        tree.write(mxml_file)
-
     def _identify_list(self, elm_list: List[Element], name: str) -> None:
         for ii, node in enumerate(elm_list, 1):
             node.attrib["id"] = f"{name}{ii}"
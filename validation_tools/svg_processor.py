@@ -2,16 +2,18 @@ from __future__ import annotations
 
 import logging
 import re
-from dataclasses import dataclass
 from enum import Enum
-from math import sqrt
+from itertools import groupby
 from pathlib import Path
-from typing import Iterator, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import numpy as np
 from lxml import etree
 from lxml.etree import _Element as Element
 
+from dolores_common.geometry import Point
+from dolores_common.svg_index import SvgIndex
+
 _LOGGER = logging.getLogger(__name__)
 
 NAMESPACES = {
@@ -20,27 +22,28 @@ NAMESPACES = {
     "mei": "http://www.music-encoding.org/ns/mei",
 }
 
+SVG_GROUP = f"{{{NAMESPACES['svg']}}}g"
+SVG_USE = f"{{{NAMESPACES['svg']}}}use"
 
-@dataclass
-class Point:
-    """Represents a point in a bounding box."""
-
-    x: int
-    y: int
+# Queries on the children of a group, compiled once
+CHILD_GROUPS_OF_CLASS = etree.XPath("svg:g[@class = $cls]", namespaces=NAMESPACES)
+CHILD_POLYGONS = etree.XPath("svg:polygon", namespaces=NAMESPACES)
+CHILD_PATHS = etree.XPath("svg:path", namespaces=NAMESPACES)
+CHILD_USES = etree.XPath("svg:use", namespaces=NAMESPACES)
 
-    def __str__(self) -> str:
-        return f"{self.x},{self.y}"
 
-    def as_tuple(self) -> Tuple[int, int]:
-        return self.x, self.y
+def find_child_group(node: Element, cls: str) -> Optional[Element]:
+    """First child group of ``node`` with class ``cls``, or None."""
+    groups = CHILD_GROUPS_OF_CLASS(node, cls=cls)
+    return groups[0] if groups else None
 
-    def dist(self, other: Point) -> float:
-        return sqrt((other.x - self.x) ** 2 + (other.y - self.y) ** 2)
 
-
-@dataclass
 class RepeatDot(Point):
-    character: str
+    __slots__ = ("character",)
+
+    def __init__(self, x: int, y: int, character: str) -> None:
+        super().__init__(x, y)
+        self.character = character
 
     def to_svg(self) -> Element:
         return etree.Element(
@@ -84,22 +87,26 @@ class RepeatDots:
         return output
 
 
-@dataclass
 class Rectangle:
-    tl: Point
-    tr: Point
-    br: Point
-    bl: Point
+    __slots__ = ("tl", "tr", "br", "bl")
+
+    def __init__(self, tl: Point, tr: Point, br: Point, bl: Point) -> None:
+        self.tl = tl
+        self.tr = tr
+        self.br = br
+        self.bl = bl
 
     def __iter__(self) -> Iterator[Point]:
         yield from [self.tl, self.tr, self.br, self.bl]
 
 
-@dataclass
 class SvgLine:
-    origin: Point
-    dest: Point
-    weight: int
+    __slots__ = ("origin", "dest", "weight")
+
+    def __init__(self, origin: Point, dest: Point, weight: int) -> None:
+        self.origin = origin
+        self.dest = dest
+        self.weight = weight
 
     def to_svg(self, ident: str) -> Element:
         output = etree.Element(
@@ -125,41 +132,64 @@ class SVGProcessor:
 
     def process(self, svg_file: Path) -> None:
         tree = etree.parse(svg_file)
-        root = tree.getroot()
+        self.process_tree(tree.getroot())
+        tree.write(svg_file)
+
+    def process_tree(self, root: Element) -> None:
+        """Identify the elements of an already parsed SVG score in place.
+
+        Parameters
+        ----------
+        root : Element
+            Root SVG score element.
+        """
+        # Every pass works on the groups of its class, collected in a single walk.
+        # No pass adds or reclassifies groups another pass looks for.
+        groups = self._collect_svg_groups(root)
 
-        self._remove_unnecessary_svg(root)
-        self._rebuild_svg_beams(root)
-        self._rebuild_svg_barlines(root)
+        self._rebuild_svg_beams(groups.by_class("beam"))
+        self._rebuild_svg_barlines(groups.by_class("barLine"))
 
         # Performed AFTER changing beams - careful!
-        self._identify_svg_timesigs(root)
-        self._identify_svg_dots(root)
-        self._identify_svg_noteheads(root)
-        self._identify_svg_tremolos(root)
-        self._identify_svg_flags(root)
-        self._identify_svg_tuplet_num(root)
-        self._identify_svg_tuplet_bracket(root)
-        self._identify_svg_mrep(root)
-        self._identify_svg_ending(root)
-
-        etree.indent(tree, "    ")
-        tree.write(svg_file)
+        self._identify_svg_timesigs(groups.by_class("meterSig"))
+        self._identify_svg_dots(groups.by_class("dots"), groups.by_class("note"))
+        self._identify_svg_noteheads(groups.by_class("note"))
+        self._identify_svg_tremolos(groups.by_class("fTrem"), groups.by_class("bTrem"))
+        self._identify_svg_flags(groups.by_class("stem"))
+        self._identify_svg_tuplet_num(groups.by_class("tuplet"))
+        self._identify_svg_tuplet_bracket(groups.by_class("tuplet"))
+        self._identify_svg_mrep(groups.by_class("mRpt"))
+        self._identify_svg_ending(groups.by_class("ending systemMilestone"))
 
-    def _remove_unnecessary_svg(self, root: Element) -> None:
-        """Remove empty SVG group elements and other minor annoyances.
+        etree.indent(root, "    ")
+
+    def _collect_svg_groups(self, root: Element) -> SvgIndex:
+        """Remove empty SVG group elements and index the rest by class.
 
         Parameters
         ----------
         root : Element
             Root element of the score in SVG format.
+
+        Returns
+        -------
+        SvgIndex
+            Non-empty groups in document order.
         """
-        group_elements = root.findall(".//svg:g", namespaces=NAMESPACES)
-        for child in group_elements:
+        groups = SvgIndex()
+        empty = []
+        for child in root.iterdescendants(SVG_GROUP):
             if len(child) == 0:
-                child.getparent().remove(child)
-                _LOGGER.debug(f"Removing subtree: {etree.tostring(child)}")
+                empty.append(child)
+            else:
+                groups.add(child)
+
+        for child in empty:
+            child.getparent().remove(child)
+            _LOGGER.debug(f"Removing subtree: {etree.tostring(child)}")
+        return groups
 
-    def _rebuild_svg_beams(self, root: Element) -> None:
+    def _rebuild_svg_beams(self, beam_nodes: List[Element]) -> None:
         """Change Verovio beam fragments into continuous beams that can be identified well.
 
         Verovio segments beams into segments. If the initial geometry of the beam is
@@ -179,13 +209,15 @@ class SVGProcessor:
         |  |  |  |
         O  O  O  O
 
+        Fragments are merged by their geometry, whatever their order in the document.
+        The resulting beams are numbered in the document order of their first
+        fragment, which puts the primary beam first as in the MusicXML.
+
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        beam_nodes : List[Element]
+            Beam groups of the score.
         """
-        beam_nodes = root.findall(".//svg:g[@class='beam']", namespaces=NAMESPACES)
-
         for beam_node in beam_nodes:
             beam_id = beam_node.get("id", "")
             beam_id_match = self.RE_BEAM_ID.match(beam_id)
@@ -194,26 +226,13 @@ class SVGProcessor:
                 raise ValueError("Invalid beam id formatting")
             id_index = int(beam_id_match.group(1))
 
-            new_beams = []
-
-            beam_fragments = beam_node.findall("./svg:polygon", namespaces=NAMESPACES)
+            beam_fragments = CHILD_POLYGONS(beam_node)
             if len(beam_fragments) == 0:
                 raise ValueError("Beam without drawn polygons")
 
-            prev_frag = self._get_beam_rectangle(beam_fragments[0])
-
-            for curr_frag in beam_fragments[1:]:
-                curr_frag = self._get_beam_rectangle(curr_frag)
-
-                if prev_frag.tr == curr_frag.tl and prev_frag.br == curr_frag.bl:
-                    prev_frag = Rectangle(
-                        prev_frag.tl, curr_frag.tr, curr_frag.br, prev_frag.bl
-                    )
-                else:
-                    new_beams.append(prev_frag)
-                    prev_frag = curr_frag
-
-            new_beams.append(prev_frag)
+            new_beams = self._merge_beam_fragments(
+                list(map(self._get_beam_rectangle, beam_fragments))
+            )
 
             for frag in beam_fragments:
                 beam_node.remove(frag)
@@ -234,6 +253,54 @@ class SVGProcessor:
             beam_node.set("id", beam_node.get("id", "") + "_parent")
             beam_node.set("class", beam_node.get("class", "") + "_parent")
 
+    def _merge_beam_fragments(self, fragments: List[Rectangle]) -> List[Rectangle]:
+        """Join beam fragments whose right edge is the left edge of another one.
+
+        Fragments are swept from left to right, keeping the beams that can still be
+        extended keyed by their right edge, so each fragment is joined in constant
+        time after sorting.
+
+        Parameters
+        ----------
+        fragments : List[Rectangle]
+            Beam fragments, in any order.
+
+        Returns
+        -------
+        List[Rectangle]
+            Continuous beams, in the document order of their first fragment.
+        """
+        order = sorted(
+            range(len(fragments)),
+            key=lambda ii: (fragments[ii].tl.x, fragments[ii].tl.y, ii),
+        )
+
+        beams: List[Rectangle] = []
+        first_fragment: List[int] = []
+        open_beams: Dict[Tuple[int, int, int, int], int] = {}
+
+        for ii in order:
+            frag = fragments[ii]
+            beam_ind = open_beams.pop(
+                (frag.tl.x, frag.tl.y, frag.bl.x, frag.bl.y), None
+            )
+
+            if beam_ind is None:
+                beam_ind = len(beams)
+                beams.append(frag)
+                first_fragment.append(ii)
+            else:
+                beam = beams[beam_ind]
+                beams[beam_ind] = Rectangle(beam.tl, frag.tr, frag.br, beam.bl)
+
+            open_beams[(frag.tr.x, frag.tr.y, frag.br.x, frag.br.y)] = beam_ind
+
+        # Number the beams in the document order of their leftmost fragment
+        return [
+            beam
+            for _, beam in sorted(zip(first_fragment, beams), key=lambda x: x[0])
+        ]
+
     def _get_beam_rectangle(self, et_poly: Element) -> Rectangle:
         points = et_poly.get("points")
 
@@ -249,8 +316,7 @@ class SVGProcessor:
 
         return Rectangle(tl, tr, br, bl)
 
-    def _rebuild_svg_barlines(self, root: Element) -> None:
-        barlines = root.findall(".//svg:g[@class='barLine']", namespaces=NAMESPACES)
+    def _rebuild_svg_barlines(self, barlines: List[Element]) -> None:
         for barline in barlines:
             self._edit_barline_elements(barline)
 
@@ -263,11 +329,11 @@ class SVGProcessor:
             if parent is not None:
                 parent.remove(barline_node)
             return None
-        segments = barline_node.findall("./svg:path", namespaces=NAMESPACES)
+        segments = CHILD_PATHS(barline_node)
         segments = list(map(self._parse_segment, segments))
         segments = self._combine_segments(segments)
 
-        dots = barline_node.findall("./svg:use", namespaces=NAMESPACES)
+        dots = CHILD_USES(barline_node)
         dots = list(map(self._parse_repeat_dot, dots))
         dots = self._combine_repeat_dots(dots, segments[0].origin.x)
 
@@ -312,22 +378,38 @@ class SVGProcessor:
         return SvgLine(Point(origin_x, origin_y), Point(target_x, target_y), weight)
 
     def _combine_segments(self, lines: List[SvgLine]) -> List[SvgLine]:
-        sorted_lines = list(sorted(lines, key=lambda x: (x.origin.x, x.origin.y)))
+        """Join the vertical barline segments that touch or overlap.
+
+        Segments are grouped by their horizontal position and weight and swept from
+        top to bottom within every group.
+
+        Parameters
+        ----------
+        lines : List[SvgLine]
+            Barline segments, in any order.
+
+        Returns
+        -------
+        List[SvgLine]
+            Joined segments, sorted by their origin.
+        """
+        sorted_lines = sorted(lines, key=lambda x: (x.origin.x, x.weight, x.origin.y))
         output_lines = []
         base_segment = sorted_lines[0]
 
         for comp_segment in sorted_lines[1:]:
             if (
-                base_segment.dest.y == comp_segment.origin.y
-                and base_segment.origin.x == comp_segment.origin.x
+                base_segment.origin.x == comp_segment.origin.x
                 and base_segment.weight == comp_segment.weight
+                and comp_segment.origin.y <= base_segment.dest.y
             ):
-                base_segment.dest = comp_segment.dest
+                if comp_segment.dest.y > base_segment.dest.y:
+                    base_segment.dest = comp_segment.dest
             else:
                 output_lines.append(base_segment)
                 base_segment = comp_segment
         output_lines.append(base_segment)
-        return output_lines
+        return sorted(output_lines, key=lambda x: (x.origin.x, x.origin.y))
 
     def _parse_repeat_dot(self, dot_element: Element) -> RepeatDot:
         character = dot_element.get(f"{{{NAMESPACES['xlink']}}}href")
@@ -345,10 +427,13 @@ class SVGProcessor:
     def _combine_repeat_dots(
         self, points: List[RepeatDot], reference_x: int
     ) -> List[RepeatDots]:
-        sorted_dots = list(sorted(points, key=lambda x: (x.x, x.y)))
+        # Pair the dots of every column from top to bottom, so that a stray dot does
+        # not shift the pairing of the following columns
+        sorted_dots = sorted(points, key=lambda x: (x.x, x.y))
         output_dots = []
-        for dot1, dot2 in zip(sorted_dots[::2], sorted_dots[1::2]):
-            if dot1.x == dot2.x:
+        for _, column in groupby(sorted_dots, key=lambda x: x.x):
+            column = list(column)
+            for dot1, dot2 in zip(column[::2], column[1::2]):
                 output_dots.append(
                     RepeatDots(
                         dot1,
@@ -360,17 +445,14 @@ class SVGProcessor:
                 )
         return output_dots
 
-    def _identify_svg_timesigs(self, root: Element) -> None:
+    def _identify_svg_timesigs(self, time_containers: List[Element]) -> None:
         """Give an identifier to time signature elements.
 
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        time_containers : List[Element]
+            Time signature groups of the score.
         """
-        time_containers = root.findall(
-            ".//svg:g[@class='meterSig']", namespaces=NAMESPACES
-        )
         memory = {}
         for container in time_containers:
             container_id = container.get("id")
@@ -382,18 +464,35 @@ class SVGProcessor:
                 container.set("id", f"{container_id}_1")
                 memory[container_id] = 2
 
-    def _identify_svg_dots(self, root: Element) -> None:
+    def _identify_svg_dots(
+        self, dots_nodes: List[Element], note_nodes: List[Element]
+    ) -> None:
         """Give an identifier to dots.
 
+        Dots under notes and rests take the identifier of their parent. Dots under
+        other elements, such as chords, are assigned to the closest notehead within
+        the element, all of them at once.
+
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        dots_nodes : List[Element]
+            Dots groups of the score.
+        note_nodes : List[Element]
+            Note groups of the score.
 
         """
-        # Find dots elements within other elements
-        dot_containers = root.xpath(".//*[svg:g[@class='dots']]", namespaces=NAMESPACES)
-        for container in dot_containers:
+        # Find the elements containing dots, each of them once with its first dots
+        dot_containers: Dict[Element, Element] = {}
+        for dots_node in dots_nodes:
+            dot_containers.setdefault(dots_node.getparent(), dots_node)
+
+        # Dots to assign to a notehead, with the index of their container
+        container_index: Dict[Element, int] = {}
+        dot_elements = []
+        dot_y = []
+        dot_container = []
+
+        for container, dots_element in dot_containers.items():
             container_id = container.get("id", None)
 
             if container_id is None:
@@ -404,11 +503,6 @@ class SVGProcessor:
             if container_class is None:
                 raise ValueError("Container has no known class")
 
-            dots_element = container.find(
-                "./svg:g[@class='dots']", namespaces=NAMESPACES
-            )
-            if dots_element is None:
-                raise ValueError("For some reason there are no dots on a dot query")
             dots_element.set("id", f"{container_id}.dots_parent")
 
             # If the object is under a note, it is easy to process because we only need to
@@ -421,7 +515,7 @@ class SVGProcessor:
 
             # Otherwise, we have to find all noteheads within the container and assign each
             # dot to the closest note.
-            dot_coords = []
+            index = container_index.setdefault(container, len(container_index))
             for dot in dots_element:
                 # Should be an ellipse
                 dot.set("class", "single_dot")
@@ -434,55 +528,116 @@ class SVGProcessor:
                         "Dot ellipse has no center. Can't identify SVG dots."
                     )
 
-                x_dot = int(x_dot)
-                y_dot = int(y_dot)
+                dot_elements.append(dot)
+                dot_y.append(int(y_dot))
+                dot_container.append(index)
 
-                dot_coords.append(Point(x_dot, y_dot))
+        if len(dot_elements) == 0:
+            return
 
-            noteheads = container.xpath(
-                ".//svg:g[@class='note']/svg:g[@class='notehead']/svg:use",
-                namespaces=NAMESPACES,
-            )
-            notehead_coords = []
+        # Noteheads of every note under a container, in document order
+        notehead_notes = []
+        notehead_y = []
+        notehead_container = []
 
-            for notehead in noteheads:
-                # Should be an ellipse
+        for note_node in note_nodes:
+            containers = [
+                container_index[x]
+                for x in note_node.iterancestors()
+                if x in container_index
+            ]
+            if len(containers) == 0:
+                continue
 
+            noteheads = (
+                use
+                for group in note_node.iterchildren(SVG_GROUP)
+                if group.get("class") == "notehead"
+                for use in group.iterchildren(SVG_USE)
+            )
+            for notehead in noteheads:
                 x_notehead = notehead.get("x")
                 y_notehead = notehead.get("y")
 
-                assert (
-                    x_notehead is not None and y_notehead is not None
-                ), "Notehead has no center"
+                if x_notehead is None or y_notehead is None:
+                    raise ValueError(
+                        "Notehead has no position. Can't identify SVG dots."
+                    )
 
-                x_notehead = int(x_notehead)
-                y_notehead = int(y_notehead)
+                for index in containers:
+                    notehead_notes.append(note_node)
+                    notehead_y.append(int(y_notehead))
+                    notehead_container.append(index)
 
-                notehead_coords.append(Point(x_notehead, y_notehead))
+        nearest = self._nearest_noteheads(
+            np.array(dot_y, dtype=np.int64),
+            np.array(dot_container, dtype=np.int64),
+            np.array(notehead_y, dtype=np.int64),
+            np.array(notehead_container, dtype=np.int64),
+        )
 
-            notehead_matrix = np.array(
-                list(map(lambda x: x.as_tuple(), notehead_coords))
-            )
-            dot_matrix = np.array(list(map(lambda x: x.as_tuple(), dot_coords)))
+        repeat_dots: Dict[int, int] = {}
+        for dot, note_ind in zip(dot_elements, nearest.tolist()):
+            note_id = notehead_notes[note_ind].get("id", None)
+            repeat_dots[note_ind] = repeat_dots.get(note_ind, 0) + 1
 
-            # Use only y coordinates
-            dist_matrix = (
-                dot_matrix[:, np.newaxis, 1] - notehead_matrix[np.newaxis, :, 1]
-            )
-            dist_matrix = np.abs(dist_matrix)
+            dot.set("id", f"{note_id}.dot{repeat_dots[note_ind]}")
+
+    @staticmethod
+    def _nearest_noteheads(
+        dot_y: np.ndarray,
+        dot_container: np.ndarray,
+        notehead_y: np.ndarray,
+        notehead_container: np.ndarray,
+    ) -> np.ndarray:
+        """Find the vertically closest notehead of the same container for every dot.
 
-            dot_indices = dist_matrix.argmin(1)
+        Every dot is paired with all the noteheads of its container and the pairs are
+        sorted by dot and distance, so the first pair of each dot is its match. Ties
+        go to the first notehead in document order.
+
+        Parameters
+        ----------
+        dot_y : np.ndarray
+            Vertical coordinate of every dot.
+        dot_container : np.ndarray
+            Container index of every dot.
+        notehead_y : np.ndarray
+            Vertical coordinate of every notehead, in document order.
+        notehead_container : np.ndarray
+            Container index of every notehead.
+
+        Returns
+        -------
+        np.ndarray
+            Index of the closest notehead for every dot.
+        """
+        order = np.argsort(notehead_container, kind="stable")
+        sorted_containers = notehead_container[order]
+
+        starts = np.searchsorted(sorted_containers, dot_container, side="left")
+        counts = (
+            np.searchsorted(sorted_containers, dot_container, side="right") - starts
+        )
 
-            repeat_dots = {ii: 1 for ii in range(len(notehead_matrix))}
+        if np.any(counts == 0):
+            raise ValueError("Dots in a container without noteheads")
 
-            for dot_ind, note_ind in enumerate(dot_indices):
-                note_ob = noteheads[note_ind].getparent().getparent()
-                note_id = note_ob.get("id", None)
+        # Offsets of the pairs of every dot within the flat pair arrays
+        first = np.cumsum(counts) - counts
+        pair_dot = np.repeat(np.arange(len(dot_y)), counts)
+        pair_notehead = order[
+            np.repeat(starts - first, counts) + np.arange(counts.sum())
+        ]
 
-                dots_element[dot_ind].set("id", f"{note_id}.dot{repeat_dots[note_ind]}")
-                repeat_dots[note_ind] += 1
+        distance = np.abs(dot_y[pair_dot] - notehead_y[pair_notehead])
+        best = np.lexsort((pair_notehead, distance, pair_dot))[first]
 
-    def _identify_svg_tremolos(self, root: Element) -> None:
+        return pair_notehead[best]
+
+    def _identify_svg_tremolos(
+        self, ftrem_objects: List[Element], btrem_objects: List[Element]
+    ) -> None:
         """Give an identifier to tremolos.
 
         Verovio will provide the identifier of the first note of the tremolo group or
@@ -491,123 +646,111 @@ class SVGProcessor:
 
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        ftrem_objects : List[Element]
+            Tremolo groups between notes of the score.
+        btrem_objects : List[Element]
+            Tremolo groups on single stems of the score.
 
         """
-        ftrem_objects = root.findall(".//svg:g[@class='fTrem']", namespaces=NAMESPACES)
         for ftrem in ftrem_objects:
             ident = ftrem.get("id")
-            for ii, line in enumerate(
-                ftrem.findall("./svg:polygon", namespaces=NAMESPACES), 1
-            ):
+            for ii, line in enumerate(CHILD_POLYGONS(ftrem), 1):
                 line.set("id", f"{ident}.line{ii}")
                 line.set("class", f"fTrem_line")
 
-        btrem_objects = root.findall(".//svg:g[@class='bTrem']", namespaces=NAMESPACES)
         for btrem in btrem_objects:
             ident = btrem.get("id")
-            for ii, line in enumerate(
-                btrem.findall("./svg:use", namespaces=NAMESPACES), 1
-            ):
+            for ii, line in enumerate(CHILD_USES(btrem), 1):
                 line.set("id", f"{ident}.line{ii}")
                 line.set("class", f"bTrem_line")
 
-    def _identify_svg_noteheads(self, root: Element) -> None:
+    def _identify_svg_noteheads(self, note_nodes: List[Element]) -> None:
         """Provide an identifier to notehead objects in the SVG.
 
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        note_nodes : List[Element]
+            Note groups of the score.
         """
-        note_nodes = root.findall(".//svg:g[@class='note']", namespaces=NAMESPACES)
         for note_node in note_nodes:
-            notehead_node = note_node.find(
-                "./svg:g[@class='notehead']", namespaces=NAMESPACES
-            )
+            notehead_node = find_child_group(note_node, "notehead")
             if notehead_node is not None:
                 notehead_node.set("id", f"{note_node.get('id')}.notehead")
 
-    def _identify_svg_mrep(self, root: Element) -> None:
+    def _identify_svg_mrep(self, mrep_nodes: List[Element]) -> None:
         """Provide an identifier to mrep objects in the SVG.
 
+        Only the first measure repeat within each measure is identified.
+
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        mrep_nodes : List[Element]
+            Measure repeat groups of the score.
         """
-        measure_nodes = root.xpath(".//svg:g[@class='measure']", namespaces=NAMESPACES)
-        for measure_node in measure_nodes:
-            measure_repeat = measure_node.find(
-                ".//svg:g[@class='mRpt']", namespaces=NAMESPACES
+        identified = set()
+        for measure_repeat in mrep_nodes:
+            measure_node = next(
+                (
+                    x
+                    for x in measure_repeat.iterancestors(SVG_GROUP)
+                    if x.get("class") == "measure"
+                ),
+                None,
             )
-            if measure_repeat is not None:
+            if measure_node is not None and measure_node not in identified:
+                identified.add(measure_node)
                 measure_repeat.set("id", f"{measure_node.get('id')}.measure_repeat")
 
-    def _identify_svg_ending(self, root: Element) -> None:
+    def _identify_svg_ending(self, ending_nodes: List[Element]) -> None:
         """Provide an identifier to ending objects in the SVG.
 
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        ending_nodes : List[Element]
+            Ending groups of the score.
         """
-        ending_nodes = root.xpath(
-            ".//svg:g[@class='ending systemMilestone']", namespaces=NAMESPACES
-        )
         for ending_node in ending_nodes:
-            bracket = ending_node.find(
-                "./svg:g[@class='voltaBracket']", namespaces=NAMESPACES
-            )
+            bracket = find_child_group(ending_node, "voltaBracket")
             if bracket is not None:
                 bracket.set("id", f"{ending_node.get('id')}.bracket")
 
-    def _identify_svg_flags(self, root: Element) -> None:
+    def _identify_svg_flags(self, stem_nodes: List[Element]) -> None:
         """Provide an identifier to flag objects in the SVG.
 
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        stem_nodes : List[Element]
+            Stem groups of the score.
         """
-        stem_nodes = root.findall(".//svg:g[@class='stem']", namespaces=NAMESPACES)
-
         for stem_node in stem_nodes:
-            flag_node = stem_node.find("./svg:g[@class='flag']", namespaces=NAMESPACES)
+            flag_node = find_child_group(stem_node, "flag")
             if flag_node is not None:
                 flag_node.set("id", f"{stem_node.get('id')}.flag")
 
-    def _identify_svg_tuplet_num(self, root: Element) -> None:
+    def _identify_svg_tuplet_num(self, tuplet_nodes: List[Element]) -> None:
         """Provide an identifier to tuplet number objects in the SVG.
 
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        tuplet_nodes : List[Element]
+            Tuplet groups of the score.
 
         """
-        tuplet_nodes = root.findall(".//svg:g[@class='tuplet']", namespaces=NAMESPACES)
         for tuplet_node in tuplet_nodes:
-            number_node = tuplet_node.find(
-                "./svg:g[@class='tupletNum']", namespaces=NAMESPACES
-            )
+            number_node = find_child_group(tuplet_node, "tupletNum")
             if number_node is not None:
                 number_node.set("id", f"{tuplet_node.get('id')}.number")
 
-    def _identify_svg_tuplet_bracket(self, root: Element) -> None:
+    def _identify_svg_tuplet_bracket(self, tuplet_nodes: List[Element]) -> None:
         """Provide an identifier to tuplet bracket objects in the SVG.
 
         Parameters
         ----------
-        root : Element
-            Root SVG score element.
+        tuplet_nodes : List[Element]
+            Tuplet groups of the score.
 
         """
-        tuplet_nodes = root.findall(".//svg:g[@class='tuplet']", namespaces=NAMESPACES)
         for tuplet_node in tuplet_nodes:
-            number_node = tuplet_node.find(
-                "./svg:g[@class='tupletBracket']", namespaces=NAMESPACES
-            )
+            number_node = find_child_group(tuplet_node, "tupletBracket")
             if number_node is not None:
                 number_node.set("id", f"{tuplet_node.get('id')}.bracket")
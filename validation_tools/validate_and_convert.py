@@ -2,21 +2,30 @@ from __future__ import annotations
 
 import json
 import logging
+import multiprocessing
 import re
 import shutil
+import sys
 from argparse import ArgumentParser, Namespace
 from dataclasses import dataclass
 from enum import Enum
 from math import inf, sqrt
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from subprocess import run
-from typing import Callable, Dict, List
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 import numpy as np
 
 # import xml.etree.ElementTree as ET
 from lxml import etree
 from lxml.etree import _Element as Element
+
+# Make the shared dolores_common package importable when running from this folder
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from build_cache import BuildCache, file_hash
 from mxml_processor import MXMLProcessor
 from svg_processor import SVGProcessor
 from validate import FileStructureValidator, ValidationOutput
@@ -37,12 +46,33 @@ VEROVIO_EXECUTABLE = (
     # "/home/gasbert/Desktop/ProjecteDolores/verovioCode/verovio/cmake/verovio"
 )
 
+# Toolkit options equivalent to the arguments given to VEROVIO_EXECUTABLE
+VEROVIO_OPTIONS = {
+    "adjustPageHeight": True,
+    "adjustPageWidth": True,
+    "breaks": "none",
+    "pageMarginBottom": 50,
+    "pageMarginLeft": 50,
+    "pageMarginRight": 50,
+    "pageMarginTop": 50,
+    "condenseFirstPage": True,
+    "header": "none",
+}
+
+VEROVIO_BACKENDS = ("executable", "toolkit")
+
+# Increase whenever MXMLProcessor or SVGProcessor change their output, so that the
+# build cache converts every file again
+PROCESSOR_VERSION = 1
+
 RE_FNAME = re.compile(r"(.+)\.([0-9]{2})\.mscz")
 RE_OLD_FILES = re.compile(r"OLD_.*")
 
 
 OUTPUT_EXTENSION = "jpg"
 
+LOG_FILE = "./validate_and_convert.log"
+
 
 # Namespace stuff to parse SVGs adequately
 
@@ -64,9 +94,27 @@ def copy_alignment_files(pack_path: Path, out_path: Path):
             shutil.copy(img, out_path / img.name)
 
 
+_WORKER_PIPELINE: Optional[ConversionPipeline] = None
+
+
+def _init_worker(pipeline: ConversionPipeline, log_level: int) -> None:
+    global _WORKER_PIPELINE
+    _WORKER_PIPELINE = pipeline
+    logging.basicConfig(filename=LOG_FILE, level=log_level)
+
+
+def _postprocess(files: Tuple[Path, Path, bool]) -> Optional[str]:
+    return _WORKER_PIPELINE.postprocess(*files)
+
+
 def main(args: Namespace) -> None:
     print(args)
-    pipeline = ConversionPipeline(args.overwrite, args.lax, args.output_path)
+    pipeline = ConversionPipeline(
+        args.overwrite, args.lax, args.output_path, args.musescore_jobs,
+        args.jobs,
+        args.verovio_backend,
+        args.build_cache,
+    )
 
     if args.set is not None:
         pipeline.convert_from_set(args.set)
@@ -92,7 +140,14 @@ class ConversionPipeline:
         overwrite: bool,
         lax: bool,
         output_path: Path | None,
+        musescore_jobs: int = 1,
+        jobs: int = 1,
+        verovio_backend: str = "executable",
+        build_cache: Path | None = None,
     ) -> None:
+        if verovio_backend not in VEROVIO_BACKENDS:
+            raise ValueError(f"Unknown Verovio backend: {verovio_backend}")
+
         self.mxml_processor = MXMLProcessor()
         self.svg_processor = SVGProcessor()
         self.validator = FileStructureValidator()
@@ -100,10 +155,24 @@ class ConversionPipeline:
         self.overwrite = overwrite
         self.lax = lax
         self.output_path = output_path
+        self.musescore_jobs = max(1, musescore_jobs)
+        self.jobs = max(1, jobs)
+        self.verovio_backend = verovio_backend
+        self.build_cache_path = build_cache
+        self.build_cache: BuildCache | None = None
+
+        # Created on first use in every process that renders SVGs
+        self._toolkit = None
 
         if self.output_path is not None and not self.output_path.exists():
             self.output_path.mkdir(parents=True)
 
+    def __getstate__(self) -> Dict:
+        state = self.__dict__.copy()
+        state["_toolkit"] = None
+        state["build_cache"] = None
+        return state
+
     def get_target_dir(self, pack_folder: Path, which: OutputFilename) -> Path:
         if self.output_path is not None:
             output = self.output_path / which.value
@@ -114,8 +183,13 @@ class ConversionPipeline:
             output.mkdir(exist_ok=False, parents=False)
         return output
 
-    def verify_existing(self, file: Path, on_non_existing: None | Callable[[], None]):
-        if not file.exists() or self.overwrite:
+    def verify_existing(
+        self,
+        file: Path,
+        on_non_existing: None | Callable[[], None],
+        force: bool = False,
+    ):
+        if not file.exists() or self.overwrite or force:
             if file.exists():
                 _LOGGER.info(f"Overwriting: {file}")
             if on_non_existing is not None:
@@ -157,10 +231,50 @@ class ConversionPipeline:
         _LOGGER.debug(f"Found {len(output)} images in pack: " + ", ".join(output))
         return output
 
+    def get_build_cache(self) -> BuildCache | None:
+        if self.build_cache is None and self.build_cache_path is not None:
+            self.build_cache = BuildCache(self.build_cache_path, self.tool_versions())
+        return self.build_cache
+
+    def tool_versions(self) -> Dict[str, str]:
+        """Versions of everything that affects the converted files."""
+        if self.verovio_backend == "toolkit":
+            verovio_version = self.get_toolkit().getVersion()
+        else:
+            verovio_version = self._executable_version(VEROVIO_EXECUTABLE)
+
+        return {
+            "musescore": self._executable_version(MUSESCORE_EXECUTABLE),
+            "verovio": verovio_version,
+            "verovio_backend": self.verovio_backend,
+            "processors": str(PROCESSOR_VERSION),
+        }
+
+    @staticmethod
+    def _executable_version(executable: str) -> str:
+        try:
+            cmd = run(
+                args=[executable, "--version"],
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        except OSError:
+            return executable
+
+        if cmd.returncode != 0 or not cmd.stdout.strip():
+            return executable
+        return cmd.stdout.strip()
+
     def convert(self, mscz_files: List[Path]) -> None:
         mxml_files = []
         svg_files = []
 
+        # Without a build cache, existing files are kept unless overwriting. With
+        # it, files are converted again exactly when their MuseScore file changed.
+        build_cache = self.get_build_cache()
+        mscz_hashes: Dict[Path, str] = {}
+
         job_file: List[Dict[str, str]] = []
 
         for mscz_file in mscz_files:
@@ -177,23 +291,92 @@ class ConversionPipeline:
                 continue
 
             # Files to be created
-            mxml_files.append(mxml_folder / f"{mscz_file.stem}.musicxml")
-            svg_files.append(svg_folder / f"{mscz_file.stem}.svg")
+            mxml_file = mxml_folder / f"{mscz_file.stem}.musicxml"
+            svg_file = svg_folder / f"{mscz_file.stem}.svg"
+
+            if build_cache is not None:
+                mscz_hash = file_hash(mscz_file)
+                if not self.overwrite and build_cache.is_current(
+                    mxml_file, svg_file, mscz_hash
+                ):
+                    _LOGGER.info(f"Skipping unchanged file: {mscz_file}")
+                    continue
+                mscz_hashes[mxml_file] = mscz_hash
+
+            mxml_files.append(mxml_file)
+            svg_files.append(svg_file)
 
             # Create MuseScore job
-            job_row = {"in": str(mscz_file), "out": str(mxml_files[-1])}
-            self.verify_existing(mxml_files[-1], lambda: job_file.append(job_row))
+            job_row = {"in": str(mscz_file), "out": str(mxml_file)}
+            self.verify_existing(
+                mxml_file,
+                lambda: job_file.append(job_row),
+                force=build_cache is not None,
+            )
 
         # Run MuseScore job
-        self.run_musescore(job_file)
+        failed = self.run_musescore(job_file)
 
         # Postprocess files and create SVGs
+        files = []
         for mxml_file, svg_file in zip(mxml_files, svg_files):
-            self.mxml_processor.process(mxml_file)
-            self.verify_existing(
-                svg_file, lambda: self.run_verovio(mxml_file, svg_file)
-            )
-            self.svg_processor.process(svg_file)
+            if str(mxml_file) in failed:
+                _LOGGER.info(f"Skipping file MuseScore could not convert: {mxml_file}")
+                continue
+            files.append((mxml_file, svg_file, build_cache is not None))
+
+        if self.jobs > 1 and len(files) > 1:
+            # Every worker runs the whole chain on one file at a time, so the
+            # identification of a file overlaps with the rendering of others
+            with ProcessPoolExecutor(
+                min(self.jobs, len(files)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self, logging.getLogger().getEffectiveLevel()),
+            ) as pool:
+                errors = list(pool.map(_postprocess, files))
+        else:
+            errors = [self.postprocess(*pair) for pair in files]
+
+        for (mxml_file, svg_file, _), error in zip(files, errors):
+            if error is not None:
+                _LOGGER.warning(f"Could not postprocess {mxml_file}: {error}")
+            elif build_cache is not None:
+                build_cache.record(mxml_file, svg_file, mscz_hashes[mxml_file])
+
+        if build_cache is not None:
+            build_cache.save()
+
+    def postprocess(
+        self, mxml_file: Path, svg_file: Path, force: bool = False
+    ) -> Optional[str]:
+        """Add identifiers to a converted MusicXML file and render it to SVG.
+
+        An existing SVG is rendered again when overwriting or if ``force`` is set.
+
+        The MusicXML file is parsed once and written once. With the toolkit backend
+        the SVG is rendered from the tree in memory as well.
+
+        Returns the error that stopped the processing of the file, if any. Only
+        errors caused by the file or the tools are returned, bugs still raise.
+        """
+        try:
+            tree = etree.parse(mxml_file)
+            self.mxml_processor.process_tree(tree.getroot())
+            tree.write(mxml_file)
+
+            if self.verovio_backend == "toolkit":
+                self.verify_existing(
+                    svg_file, lambda: self.render_verovio(tree, svg_file), force
+                )
+            else:
+                self.verify_existing(
+                    svg_file, lambda: self.run_verovio(mxml_file, svg_file), force
+                )
+                self.svg_processor.process(svg_file)
+        except (ValueError, etree.Error, OSError, ImportError) as e:
+            return f"{type(e).__name__}: {e}"
+        return None
 
     def run_verovio(self, mxml_file: Path, svg_file: Path) -> None:
         # Run Verovio to generate the SVGs accordingly
@@ -229,8 +412,84 @@ class ConversionPipeline:
             _LOGGER.info("Output for Verovio: " + cmd.stderr)
             raise ValueError("Return code for Verovio was not zero!")
 
-    def run_musescore(self, job: List[Dict[str, str]]) -> None:
-        job_path = Path("job.json")
+    def render_verovio(self, mxml_tree: etree._ElementTree, svg_file: Path) -> None:
+        """Render and identify the SVG of a MusicXML tree with the Verovio toolkit.
+
+        The toolkit is kept alive between files and the SVG is processed in memory,
+        so it is written only once.
+        """
+        toolkit = self.get_toolkit()
+
+        if not toolkit.loadData(etree.tostring(mxml_tree, encoding="unicode")):
+            _LOGGER.info("Output for Verovio: " + toolkit.getLog())
+            raise ValueError("Verovio could not load the MusicXML file!")
+
+        root = etree.fromstring(toolkit.renderToSVG(1).encode("utf-8"))
+        self.svg_processor.process_tree(root)
+        etree.ElementTree(root).write(svg_file)
+
+    def get_toolkit(self):
+        if self._toolkit is None:
+            try:
+                import verovio
+            except ImportError as e:
+                raise ImportError(
+                    "The toolkit backend needs the verovio Python package"
+                ) from e
+
+            self._toolkit = verovio.toolkit()
+            self._toolkit.setOptions(VEROVIO_OPTIONS)
+        return self._toolkit
+
+    def run_musescore(self, job: List[Dict[str, str]]) -> Set[str]:
+        """Convert the files of a MuseScore job, returning the outputs that failed.
+
+        The job is split into one shard per worker and every shard is converted by
+        its own MuseScore process. When a shard fails, its files are converted
+        again one at a time so only the broken ones are lost.
+        """
+        if len(job) == 0:
+            return set()
+
+        num_shards = min(self.musescore_jobs, len(job))
+        shards = [job[ii::num_shards] for ii in range(num_shards)]
+
+        with TemporaryDirectory(prefix="musescore_job_") as job_dir:
+            with ThreadPoolExecutor(num_shards) as pool:
+                results = list(
+                    pool.map(
+                        lambda ii: self._run_musescore_shard(
+                            shards[ii], Path(job_dir) / f"job_{ii}.json"
+                        ),
+                        range(num_shards),
+                    )
+                )
+
+        failed = set().union(*results)
+        for output in sorted(failed):
+            _LOGGER.info(f"MuseScore could not convert: {output}")
+        return failed
+
+    def _run_musescore_shard(
+        self, shard: List[Dict[str, str]], job_path: Path
+    ) -> Set[str]:
+        if self._run_musescore_job(shard, job_path):
+            return set()
+        if len(shard) == 1:
+            return {shard[0]["out"]}
+
+        _LOGGER.info(f"Retrying the {len(shard)} files of a failed shard one by one")
+        failed = set()
+        for job_row in shard:
+            if not self._run_musescore_job([job_row], job_path):
+                failed.add(job_row["out"])
+        return failed
+
+    def _run_musescore_job(self, job: List[Dict[str, str]], job_path: Path) -> bool:
+        # Outputs left by earlier runs would pass for files converted by this one
+        for job_row in job:
+            Path(job_row["out"]).unlink(missing_ok=True)
+
         with open(job_path, "w") as f_job:
             json.dump(job, f_job, indent=4)
 
@@ -248,7 +507,9 @@ class ConversionPipeline:
 
         if cmd.returncode != 0:
             _LOGGER.info("Output for MuseScore: " + cmd.stderr)
-            raise ValueError("Return code for MuseScore was not zero!")
+            return False
+        # MuseScore may skip a file of the job without reporting it
+        return all(Path(job_row["out"]).exists() for job_row in job)
 
     def convert_from_set(self, set_path: Path) -> None:
         validation = self.validator.validate_set(set_path)
@@ -373,10 +634,33 @@ def setup() -> Namespace:
         type=Path,
         help="Force overwriting of already converted files.",
     )
+    parser.add_argument(
+        "--musescore_jobs",
+        type=int,
+        default=1,
+        help="Number of MuseScore processes converting files at the same time.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes adding identifiers and rendering the SVGs.",
+    )
+    parser.add_argument(
+        "--verovio_backend",
+        choices=VEROVIO_BACKENDS,
+        default="executable",
+        help="Render SVGs with the Verovio executable or its Python toolkit.",
+    )
+    parser.add_argument(
+        "--build_cache",
+        type=Path,
+        help="JSON file recording the converted files, to only convert changed ones.",
+    )
     args = parser.parse_args()
 
     logging.basicConfig(
-        filename="./validate_and_convert.log",
+        filename=LOG_FILE,
         level=logging.INFO if args.debug is False else logging.DEBUG,
     )
     return args